@@ -2,7 +2,9 @@
 Vocabulary Pro – FastAPI entry point.
 
 Endpoints:
-  POST /webhook/trigger          – main workflow (called by cron via curl)
+  POST /webhook/trigger          – start the main workflow (202; runs in the background)
+  GET  /webhook/status           – state and result of the latest workflow run
+  POST /webhook/pregenerate      – pre-generate the posts (text + image) of a day's slots (202; background)
   GET  /health                   – liveness check
   GET  /status                   – word tracker + last run info
 
@@ -11,33 +13,75 @@ Cron example (every day at 8 AM):
              -H "X-Webhook-Secret: your_secret" >> /var/log/vocab_pro.log 2>&1
 """
 
+import asyncio
+import fcntl
 import logging
 import logging.handlers
+import multiprocessing
+import os
+import sys
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
-
-from fastapi import FastAPI, Header, HTTPException, status
-from fastapi.responses import JSONResponse
-
-from modules.config import LOG_LEVEL, LOGS_DIR, WEBHOOK_SECRET
-from modules.word_manager import get_status, selectNextWord
+from typing import IO, Annotated, Optional
+from zoneinfo import ZoneInfo
+
+import orjson
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Field
+
+from modules import pregen
+from modules.config import LAST_RUN_FILE, LOGS_DIR, TIMEZONE, get_settings
+from modules.word_manager import (
+    claim_post,
+    confirm_post,
+    get_status,
+    release_post,
+    selectNextWord,
+)
 from modules.openai_client import generate_image_prompt, generate_post_text
-from modules.replicate_client import generate_image
-from modules.image_processor import create_post_image
-from modules.facebook_client import post_to_facebook
+from modules.image_processor import create_post_image, post_image_filename
+from modules.facebook_client import aclose_http_client, post_to_facebook
 
 # ─── Logging ──────────────────────────────────────────────────────────────────
+# Rotation is not safe with several processes on one file, so each uvicorn
+# worker gets its own rotating file: the first one whose lock is free –
+# vocab_pro.log, vocab_pro.1.log, … The lock is held for the process lifetime.
+_MAX_LOG_FILES = 64
+_log_file_lock: Optional[IO[str]] = None
+
+
+def _worker_log_file() -> Path:
+    global _log_file_lock
+    for n in range(_MAX_LOG_FILES):
+        lock = open(LOGS_DIR / f"vocab_pro.{n}.lock", "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            continue
+        _log_file_lock = lock
+        return LOGS_DIR / ("vocab_pro.log" if n == 0 else f"vocab_pro.{n}.log")
+    raise RuntimeError(f"More than {_MAX_LOG_FILES} processes are logging to {LOGS_DIR}.")
+
+
 def _setup_logging() -> None:
     fmt = "%(asctime)s [%(levelname)s] %(name)s – %(message)s"
-    handlers: list[logging.Handler] = [logging.StreamHandler()]
-
-    log_file = LOGS_DIR / "vocab_pro.log"
-    rotating = logging.handlers.RotatingFileHandler(
-        log_file, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"
-    )
-    handlers.append(rotating)
+    handlers: list[logging.Handler] = [
+        logging.handlers.RotatingFileHandler(
+            _worker_log_file(), maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"
+        )
+    ]
+    if sys.stderr.isatty():
+        # Console only when run by hand – under start.sh stderr is an
+        # unrotated file, and everything is in the rotating log already
+        handlers.append(logging.StreamHandler())
 
-    logging.basicConfig(level=getattr(logging, LOG_LEVEL, logging.INFO), format=fmt, handlers=handlers)
+    log_level = getattr(logging, get_settings().log_level, logging.INFO)
+    logging.basicConfig(level=log_level, format=fmt, handlers=handlers)
 
 
 _setup_logging()
@@ -48,12 +92,67 @@ app = FastAPI(
     title="Vocabulary Pro – Facebook Autopilot",
     description="Automated word-of-the-day posting to Facebook.",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
+
+# Blocking workflow steps (LLM SDKs, state file) run on worker threads so
+# the event loop keeps serving /health, /status and triggers. The Replicate
+# and Facebook steps are native async (httpx) and are awaited directly.
+_WORKFLOW_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="workflow")
+# Compositing + JPEG encoding is pure CPU and holds the GIL – give it its own
+# processes. "spawn" because forking a process that runs threads is unsafe.
+_IMAGE_EXECUTOR = ProcessPoolExecutor(
+    max_workers=2, mp_context=multiprocessing.get_context("spawn")
 )
 
 
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    _WORKFLOW_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    _IMAGE_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    await aclose_http_client()
+
+
+# ─── Probe responses ─────────────────────────────────────────────────────────
+# Health probes hit these often – serve them from memory, not from disk.
+_HEALTH_BODY = orjson.dumps({"status": "ok"})
+_STATUS_TTL_SECONDS = 5.0
+_status_cache: Optional[tuple[float, dict]] = None   # (monotonic time, get_status())
+
+
+def _cached_status() -> dict:
+    global _status_cache
+    now = time.monotonic()
+    if _status_cache is None or now - _status_cache[0] > _STATUS_TTL_SECONDS:
+        _status_cache = (now, get_status())
+    return _status_cache[1]
+
+
+# ─── Last run ────────────────────────────────────────────────────────────────
+# Triggers return before the workflow finishes, so its outcome is recorded
+# here for GET /webhook/status. A file, not a global: with several uvicorn
+# workers the probe may land on a different process than the run.
+def _record_run(info: dict) -> None:
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=LAST_RUN_FILE.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(info))
+        os.replace(tmp_path, LAST_RUN_FILE)
+    except OSError as e:
+        logger.warning("Could not record workflow run (%s).", e)
+
+
+def _last_run() -> Optional[dict]:
+    try:
+        return orjson.loads(LAST_RUN_FILE.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
 # ─── Auth helper ─────────────────────────────────────────────────────────────
 def _verify_secret(secret: str) -> None:
-    if WEBHOOK_SECRET and secret != WEBHOOK_SECRET:
+    expected = get_settings().webhook_secret.get_secret_value()
+    if expected and secret != expected:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing webhook secret.",
@@ -61,57 +160,125 @@ def _verify_secret(secret: str) -> None:
 
 
 # ─── Workflow ─────────────────────────────────────────────────────────────────
-def _run_workflow() -> dict:
+_TZ = ZoneInfo(TIMEZONE)   # resolved once – the workflow's notion of "today"
+
+
+async def _run_workflow(slot: Optional[str] = None) -> dict:
     """
     Execute the full word-of-the-day pipeline.
+    With a slot that was pre-generated, its reserved word, post text and post
+    image are used; whatever is missing is generated live. A word that was
+    already posted on that day is skipped (duplicate trigger).
     Returns a result dict. Raises on any unrecoverable error.
     """
+    # Replicate SDK + PIL are only needed here – keep them off the boot path
+    from modules.replicate_client import generate_image_bytes
+
     start = time.time()
     steps: list[str] = []
+    loop = asyncio.get_running_loop()
+
+    def in_thread(fn, *args):
+        return loop.run_in_executor(_WORKFLOW_EXECUTOR, fn, *args)
 
     def log_step(msg: str) -> None:
         logger.info(msg)
         steps.append(msg)
 
-    # Step 1 – Select next word
+    # Step 1 – Select next word. With a slot, the word is pinned to it (or was
+    # already, by pre-generation or an earlier trigger), so a repeated trigger
+    # for the slot gets the same word.
     log_step("Step 1: Selecting next word…")
-    word = selectNextWord()
+    if slot:
+        entry = await in_thread(pregen.reserve_entry, slot)
+        word = entry["word"]
+    else:
+        entry = None
+        word = await in_thread(selectNextWord)
     if not word:
         raise RuntimeError("selectNextWord() returned empty string.")
-    log_step(f"Step 1 done: word='{word}'")
-
-    # Step 2 – Generate Bengali post text
-    log_step("Step 2: Generating Bengali post text…")
-    post_text = generate_post_text(word)
-    if not post_text:
-        raise RuntimeError("generate_post_text() returned empty string.")
-    log_step(f"Step 2 done: {len(post_text)} chars")
-
-    # Step 3 – Generate image prompt
-    log_step("Step 3: Generating image prompt…")
-    image_prompt = generate_image_prompt(post_text, word)
-    if not image_prompt:
-        raise RuntimeError("generate_image_prompt() returned empty string.")
-    log_step(f"Step 3 done: prompt length={len(image_prompt)}")
-
-    # Step 4 – Generate image via Gemini
-    log_step("Step 4: Generating image with Gemini…")
-    pil_image = generate_image(image_prompt)
-    if pil_image is None:
-        raise RuntimeError("generate_image() returned None.")
-    log_step(f"Step 4 done: {pil_image.width}×{pil_image.height}")
-
-    # Step 5 – Compose post image
-    log_step("Step 5: Composing post image…")
-    image_path: Path = create_post_image(pil_image, word)
-    if not image_path.exists():
-        raise RuntimeError(f"Post image not found after creation: {image_path}")
-    log_step(f"Step 5 done: {image_path.name}")
-
-    # Step 6 – Post to Facebook
-    log_step("Step 6: Posting to Facebook…")
-    post_id = post_to_facebook(post_text, image_path)
+    log_step(f"Step 1 done: word='{word}'" + (f" (slot {slot})" if slot else ""))
+    # The day the duplicate guard counts in – the slot's date, else today in TIMEZONE
+    post_day = pregen.parse_slot(slot)[0] if slot else datetime.now(_TZ).date()
+
+    # Duplicate guard – a re-fired trigger stops here, before any API call:
+    # the slot already has a post, or the word was posted (or is being
+    # posted by another run) that day.
+    if (entry and entry.get("post_id")) or not await in_thread(claim_post, post_day, word):
+        log_step(f"Skipped: '{word}' was already posted on {post_day}.")
+        return {
+            "success": True,
+            "skipped": True,
+            "word": word,
+            "post_id": entry.get("post_id") if entry else None,
+            "elapsed_seconds": round(time.time() - start, 2),
+            "steps": steps,
+        }
+
+    try:
+        image_bytes: Optional[bytes] = await in_thread(pregen.load_image, slot) if entry else None
+
+        async def post_text_job() -> str:
+            if entry and entry.get("post_text"):
+                return entry["post_text"]
+            return await in_thread(generate_post_text, word)   # single-word fallback
+
+        async def image_prompt_job() -> Optional[str]:
+            if image_bytes:
+                return None   # post image already composed – no prompt needed
+            if entry and entry.get("image_prompt"):
+                return entry["image_prompt"]
+            return await in_thread(generate_image_prompt, word)
+
+        # Steps 2+3 – Bengali post text and image prompt (independent → concurrent)
+        log_step("Step 2+3: Generating Bengali post text and image prompt…")
+        post_text, image_prompt = await asyncio.gather(post_text_job(), image_prompt_job())
+        if not post_text:
+            raise RuntimeError("generate_post_text() returned empty string.")
+        log_step(f"Step 2 done: {len(post_text)} chars")
+        image_name = post_image_filename(word)
+
+        if image_bytes:
+            log_step(f"Steps 3-5 skipped: pre-generated {image_name} ({len(image_bytes) // 1024} KB)")
+        else:
+            if not image_prompt:
+                raise RuntimeError("generate_image_prompt() returned empty string.")
+            log_step(f"Step 3 done: prompt length={len(image_prompt)}")
+
+            # Step 4 – Generate image via Replicate
+            log_step("Step 4: Generating image with Replicate…")
+            ai_image, content_type = await generate_image_bytes(image_prompt)
+            log_step(f"Step 4 done: {len(ai_image) // 1024} KB {content_type}")
+
+            # Step 5 – Compose post image
+            log_step("Step 5: Composing post image…")
+            # The encoded file goes to the worker as-is (smaller to pickle than
+            # pixels) and is decoded there. The JPEG comes back as bytes and goes
+            # straight into the upload – no disk.
+            image_bytes = await loop.run_in_executor(_IMAGE_EXECUTOR, create_post_image, ai_image, word)
+            if not image_bytes:
+                raise RuntimeError("create_post_image() returned no image data.")
+            log_step(f"Step 5 done: {image_name} ({len(image_bytes) // 1024} KB)")
+
+        # Step 6 – Post to Facebook
+        log_step("Step 6: Posting to Facebook…")
+        post_id = await post_to_facebook(post_text, image_bytes, image_name)
+    except BaseException:
+        await in_thread(release_post, post_day, word)   # not posted – let a retry post it
+        raise
+    # The post is live from here on – the claim must stay, whatever fails below
     log_step(f"Step 6 done: post_id={post_id}")
+    if entry:
+        entry["post_id"] = post_id
+        try:
+            await in_thread(pregen.save_entry, entry)
+        except Exception as e:
+            logger.error("Could not record post_id for slot %s (%s).", slot, e)
+    try:
+        await in_thread(confirm_post, post_day, word)
+    except Exception as e:
+        # Left pending – still blocks retries for 30 minutes
+        logger.error("Could not mark '%s' as posted on %s (%s).", word, post_day, e)
 
     elapsed = round(time.time() - start, 2)
     logger.info("Workflow complete in %.2fs. Word: '%s', FB post: %s", elapsed, word, post_id)
@@ -120,7 +287,7 @@ def _run_workflow() -> dict:
         "success": True,
         "word": word,
         "post_id": post_id,
-        "image_file": image_path.name,
+        "image_file": image_name,
         "elapsed_seconds": elapsed,
         "steps": steps,
     }
@@ -128,40 +295,138 @@ def _run_workflow() -> dict:
 
 # ─── Endpoints ───────────────────────────────────────────────────────────────
 
-@app.post("/webhook/trigger", summary="Trigger the word-of-the-day workflow")
+async def _run_workflow_in_background(slot: Optional[str]) -> None:
+    """Run the workflow after the trigger has been answered and record the outcome."""
+    global _status_cache
+    started_at = int(time.time())
+    _record_run({"state": "running", "slot": slot, "started_at": started_at})
+    try:
+        result = await _run_workflow(slot)
+        _record_run({
+            "state": "succeeded", "slot": slot, "started_at": started_at,
+            "finished_at": int(time.time()), "result": result,
+        })
+    except Exception as e:
+        logger.exception("Workflow failed: %s", e)
+        _record_run({
+            "state": "failed", "slot": slot, "started_at": started_at,
+            "finished_at": int(time.time()), "error": str(e),
+        })
+    finally:
+        _status_cache = None   # word index changed – next /status reads fresh state
+
+
+@app.post(
+    "/webhook/trigger",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Start the word-of-the-day workflow",
+)
 async def trigger(
+    background_tasks: BackgroundTasks,
+    slot: Optional[str] = Query(default=None, pattern=r"^\d{4}-\d{2}-\d{2}-\d{2}$"),
+    x_webhook_secret: str = Header(default="", alias="X-Webhook-Secret"),
+) -> ORJSONResponse:
+    _verify_secret(x_webhook_secret)
+    if slot:
+        # The pattern only checks the shape – reject e.g. 2026-02-30-08 or hour 99
+        # here, before a background run would reserve a word for it
+        try:
+            pregen.parse_slot(slot)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    logger.info("Webhook trigger received (slot=%s).", slot)
+    # The workflow takes tens of seconds – accept now, run after the response
+    background_tasks.add_task(_run_workflow_in_background, slot)
+    return ORJSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"accepted": True, "slot": slot, "status_url": "/webhook/status"},
+    )
+
+
+@app.get("/webhook/status", summary="Latest workflow run")
+async def workflow_status(
     x_webhook_secret: str = Header(default="", alias="X-Webhook-Secret"),
-) -> JSONResponse:
+) -> ORJSONResponse:
     _verify_secret(x_webhook_secret)
-    logger.info("Webhook trigger received.")
     try:
-        result = _run_workflow()
-        return JSONResponse(status_code=200, content=result)
+        run = _last_run()
+    except (orjson.JSONDecodeError, OSError) as e:
+        return ORJSONResponse(status_code=500, content={"state": "error", "error": str(e)})
+    return ORJSONResponse(run or {"state": "idle"})
+
+
+class PregenerateRequest(BaseModel):
+    date: date
+    hours: list[Annotated[int, Field(ge=0, le=23)]] = Field(min_length=1)
+
+
+async def _pregenerate_in_background(day: date, hours: list[int]) -> None:
+    """Run the pre-generation after the request has been answered and log the outcome."""
+    global _status_cache
+    try:
+        entries = await pregen.pregenerate(day, hours, _IMAGE_EXECUTOR)
     except Exception as e:
-        logger.exception("Workflow failed: %s", e)
-        return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)},
-        )
+        logger.exception("Pre-generation for %s failed: %s", day, e)
+        return
+    finally:
+        _status_cache = None   # words were reserved – the index moved
+    posted = [e["slot"] for e in entries if e.get("post_id")]
+    ready = sum(1 for e in entries if not e.get("post_id") and e.get("post_text") and e["image_ready"])
+    logger.info(
+        "Pre-generation for %s done – %d/%d posts ready%s.",
+        day, ready, len(entries) - len(posted),
+        f", already posted: {', '.join(posted)}" if posted else "",
+    )
+
+
+@app.post(
+    "/webhook/pregenerate",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Pre-generate the posts of a day's slots",
+)
+async def pregenerate(
+    body: PregenerateRequest,
+    background_tasks: BackgroundTasks,
+    x_webhook_secret: str = Header(default="", alias="X-Webhook-Secret"),
+) -> ORJSONResponse:
+    _verify_secret(x_webhook_secret)
+    logger.info("Pre-generation requested for %s, hours %s.", body.date, body.hours)
+    # Texts + images take minutes – accept now, run after the response
+    background_tasks.add_task(_pregenerate_in_background, body.date, body.hours)
+    return ORJSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "accepted": True,
+            "date": body.date.isoformat(),
+            "slots": [pregen.slot_key(body.date, h) for h in sorted(set(body.hours))],
+        },
+    )
 
 
 @app.get("/health", summary="Liveness check")
-async def health() -> JSONResponse:
-    return JSONResponse({"status": "ok"})
+async def health() -> Response:
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @app.get("/status", summary="Current word tracker state")
-async def word_status() -> JSONResponse:
+async def word_status() -> ORJSONResponse:
     try:
-        info = get_status()
-        return JSONResponse({"status": "ok", **info})
+        info = _cached_status()
+        return ORJSONResponse({"status": "ok", **info})
     except Exception as e:
-        return JSONResponse(status_code=500, content={"status": "error", "error": str(e)})
+        return ORJSONResponse(status_code=500, content={"status": "error", "error": str(e)})
 
 
 # ─── Dev runner ──────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     import uvicorn
-    from modules.config import PORT
-
-    uvicorn.run("main:app", host="0.0.0.0", port=PORT, reload=False)
+    settings = get_settings()
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=settings.port,
+        loop="uvloop",
+        http="httptools",
+        workers=settings.web_concurrency,
+        reload=False,
+    )
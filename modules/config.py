@@ -1,59 +1,89 @@
 """
 Configuration module – loads and validates all environment variables.
-All other modules import from here instead of reading os.environ directly.
+All other modules read settings through get_settings() instead of os.environ.
+
+Environment values are parsed once per process into a typed Settings object
+(secrets as SecretStr, PORT as int, flags as bool); file paths are constants.
 """
 
-import os
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import Literal
+
+from pydantic import Field, SecretStr, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-# Load .env from project root (works regardless of CWD)
+# .env in project root (works regardless of CWD)
 _ROOT = Path(__file__).resolve().parent.parent
-load_dotenv(_ROOT / ".env")
 
 
-def _require(key: str) -> str:
-    val = os.getenv(key, "").strip()
-    if not val:
-        raise EnvironmentError(f"Required environment variable '{key}' is missing or empty.")
-    return val
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=_ROOT / ".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        str_strip_whitespace=True,
+    )
+
+    # ─── OpenAI ────────────────────────────────────────────────────────────────
+    openai_api_key: SecretStr = Field(min_length=1)
+
+    # ─── Anthropic (Claude) ────────────────────────────────────────────────────
+    anthropic_api_key: SecretStr = SecretStr("")
 
+    # ─── Text generation provider: "gpt" | "claude"  ← change here to switch ──
+    text_generation_provider: Literal["gpt", "claude"] = "gpt"
 
-def _optional(key: str, default: str = "") -> str:
-    return os.getenv(key, default).strip()
+    # ─── Replicate ─────────────────────────────────────────────────────────────
+    replicate_api_token: SecretStr = Field(min_length=1)
 
+    # ─── Facebook ──────────────────────────────────────────────────────────────
+    fb_app_id: str = Field(min_length=1)
+    fb_app_secret: SecretStr = Field(min_length=1)
+    fb_page_id: str = Field(min_length=1)
+    fb_user_access_token: SecretStr = SecretStr("")   # only needed for first bootstrap
 
-# ─── OpenAI ────────────────────────────────────────────────────────────────────
-OPENAI_API_KEY: str = _require("OPENAI_API_KEY")
+    # ─── App settings ──────────────────────────────────────────────────────────
+    webhook_secret: SecretStr = SecretStr("")
+    log_level: str = "INFO"
+    port: int = 8002
+    web_concurrency: int = Field(default=2, ge=1)   # uvicorn worker processes
+    debug_save_images: bool = False   # keep a copy of each post image in output/
 
-# ─── Anthropic (Claude) ────────────────────────────────────────────────────────
-ANTHROPIC_API_KEY: str = _optional("ANTHROPIC_API_KEY")
+    @field_validator("text_generation_provider", mode="before")
+    @classmethod
+    def _lower(cls, v: str) -> str:
+        return v.strip().lower() if isinstance(v, str) else v
 
-# ─── Text generation provider: "gpt" | "claude"  ← change here to switch ──────
-TEXT_GENERATION_PROVIDER: str = _optional("TEXT_GENERATION_PROVIDER", "gpt").lower()
+    @field_validator("log_level", mode="before")
+    @classmethod
+    def _upper(cls, v: str) -> str:
+        return v.strip().upper() if isinstance(v, str) else v
 
-# ─── Replicate ─────────────────────────────────────────────────────────────────
-REPLICATE_API_TOKEN: str = _require("REPLICATE_API_TOKEN")
 
-# ─── Facebook ──────────────────────────────────────────────────────────────────
-FB_APP_ID: str = _require("FB_APP_ID")
-FB_APP_SECRET: str = _require("FB_APP_SECRET")
-FB_PAGE_ID: str = _require("FB_PAGE_ID")
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Parse and validate the environment once; later calls return the same object."""
+    return Settings()
+
+
+# Posting timezone – the scheduler's slots and the server's "posted today"
+# check both use it, so a day starts at the same midnight for both.
+TIMEZONE = "Asia/Dhaka"
+
 
 # ─── Paths ─────────────────────────────────────────────────────────────────────
 WORDS_FILE: Path = _ROOT / "data" / "words.txt"
 HASHTAGS_FILE: Path = _ROOT / "data" / "hashtags.txt"
 STATE_FILE: Path = _ROOT / "data" / "state.json"
 TOKEN_FILE: Path = _ROOT / "data" / "fb_tokens.json"
+LLM_CACHE_FILE: Path = _ROOT / "data" / "llm_cache.sqlite"
+LAST_RUN_FILE: Path = _ROOT / "data" / "last_run.json"   # outcome of the latest workflow run
+GENERATED_DIR: Path = _ROOT / "data" / "generated"   # pre-generated posts, one file per slot
 OUTPUT_DIR: Path = _ROOT / "output"
 FONTS_DIR: Path = _ROOT / "fonts"
 LOGS_DIR: Path = _ROOT / "logs"
 
-# ─── App settings ──────────────────────────────────────────────────────────────
-WEBHOOK_SECRET: str = _optional("WEBHOOK_SECRET")
-LOG_LEVEL: str = _optional("LOG_LEVEL", "INFO").upper()
-PORT: int = int(_optional("PORT", "8002"))
-
 # Ensure directories exist
-for _d in [OUTPUT_DIR, FONTS_DIR, LOGS_DIR, _ROOT / "data"]:
+for _d in [OUTPUT_DIR, FONTS_DIR, LOGS_DIR, GENERATED_DIR]:
     _d.mkdir(parents=True, exist_ok=True)
@@ -7,86 +7,216 @@ Token flow:
   3. We exchange that for a Page Access Token (never expires when derived
      from a long-lived user token + app credentials)
   4. Before every post we validate the token. If it's within the refresh
-     window (or already expired) we refresh it automatically.
+     window (or already expired) we refresh it automatically. A successful
+     debug_token check is remembered for an hour to save a round-trip.
   5. All tokens are stored encrypted in data/fb_tokens.json.
 
 Developer only has to provide the initial short-lived token once.
 """
 
-import json
+import copy
+import functools
+import hashlib
 import logging
 import os
 import tempfile
 import time
-from pathlib import Path
 from typing import Optional
-
-import requests
-
-from modules.config import (
-    FB_APP_ID,
-    FB_APP_SECRET,
-    FB_PAGE_ID,
-    TOKEN_FILE,
+from urllib.parse import urlencode
+
+import httpx
+import orjson
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
 )
 
+from modules.config import HASHTAGS_FILE, TOKEN_FILE, get_settings
+
 logger = logging.getLogger(__name__)
 
 _GRAPH = "https://graph.facebook.com/v21.0"
 _TOKEN_REFRESH_DAYS_BEFORE_EXPIRY = 10  # refresh when <10 days remain
+_TOKEN_VALIDATION_TTL = 3600            # trust a debug_token result for 1 hour
+_INVALID_TOKEN_ERROR_CODE = 190         # Graph "Invalid OAuth access token"
+# Graph rate-limit codes (app, user, page): the request was rejected before it
+# was applied, so retrying the photo upload cannot publish it twice. Codes 1
+# (unknown) and 2 (service error) give no such guarantee and are not retried.
+_RATE_LIMIT_ERROR_CODES = {4, 17, 341}
+# Reads are idempotent, so they also retry on unknown / service errors
+_TRANSIENT_READ_ERROR_CODES = _RATE_LIMIT_ERROR_CODES | {1, 2}
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GraphAPIError(RuntimeError):
+    """Graph API answered with an error object; ``code`` is Facebook's error code."""
+
+    def __init__(self, error: dict, status_code: Optional[int] = None):
+        self.code = error.get("code") if isinstance(error, dict) else None
+        self.status_code = status_code
+        super().__init__(f"Graph API error: {error}")
+
 
 # ─── Token persistence ────────────────────────────────────────────────────────
 
+# Parsed token file keyed by its mtime, so other workers' writes are still seen
+_TOKENS_CACHE: Optional[tuple[int, dict]] = None
+
+
 def _load_tokens() -> dict:
-    if TOKEN_FILE.exists():
+    global _TOKENS_CACHE
+    try:
+        mtime_ns = TOKEN_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    except OSError as e:
+        logger.warning("Token file unreadable (%s). Starting fresh.", e)
+        return {}
+    if _TOKENS_CACHE is None or _TOKENS_CACHE[0] != mtime_ns:
         try:
-            with open(TOKEN_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
+            _TOKENS_CACHE = (mtime_ns, orjson.loads(TOKEN_FILE.read_bytes()))
+        except (orjson.JSONDecodeError, OSError) as e:
             logger.warning("Token file unreadable (%s). Starting fresh.", e)
-    return {}
+            return {}
+    return copy.deepcopy(_TOKENS_CACHE[1])  # callers mutate before saving
 
 
 def _save_tokens(tokens: dict) -> None:
+    global _TOKENS_CACHE
     dir_ = TOKEN_FILE.parent
     fd, tmp = tempfile.mkstemp(dir=dir_, suffix=".tmp")
-    with os.fdopen(fd, "w", encoding="utf-8") as f:
-        json.dump(tokens, f, indent=2)
+    with os.fdopen(fd, "wb") as f:
+        f.write(orjson.dumps(tokens, option=orjson.OPT_INDENT_2))
     os.replace(tmp, TOKEN_FILE)
+    _TOKENS_CACHE = (TOKEN_FILE.stat().st_mtime_ns, copy.deepcopy(tokens))
     logger.debug("Token file updated.")
 
 
 # ─── Graph API helpers ────────────────────────────────────────────────────────
 
-def _graph_get(path: str, params: dict) -> dict:
-    url = f"{_GRAPH}/{path.lstrip('/')}"
-    resp = requests.get(url, params=params, timeout=30)
-    data = resp.json()
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http() -> httpx.AsyncClient:
+    """
+    Shared async client for graph.facebook.com. Keep-alive + HTTP/2 lets the
+    debug_token, token-exchange and photo calls reuse one connection, and
+    awaiting them keeps the event loop free while Facebook responds.
+    The transport retries failed connection attempts.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=30,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
+            ),
+        )
+    return _http_client
+
+
+async def aclose_http_client() -> None:
+    """Close the shared client (call on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _parse_graph_response(resp: httpx.Response) -> dict:
+    try:
+        data = resp.json()
+    except ValueError:
+        # e.g. an HTML 502 page from Facebook's edge
+        raise GraphAPIError({"message": resp.text[:200]}, resp.status_code) from None
     if "error" in data:
-        raise RuntimeError(f"Graph API error: {data['error']}")
+        raise GraphAPIError(data["error"], resp.status_code)
     return data
 
 
-def _graph_post(path: str, data: dict, files: Optional[dict] = None) -> dict:
+def _is_rate_limit_error(exc: BaseException) -> bool:
+    return isinstance(exc, GraphAPIError) and exc.code in _RATE_LIMIT_ERROR_CODES
+
+
+def _is_retryable_read(exc: BaseException) -> bool:
+    """GETs are idempotent – also retry network failures and 429/5xx."""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, GraphAPIError) and exc.status_code in _RETRY_STATUSES:
+        return True
+    return isinstance(exc, GraphAPIError) and exc.code in _TRANSIENT_READ_ERROR_CODES
+
+
+def _retrying(predicate):
+    return retry(
+        retry=retry_if_exception(predicate),
+        stop=stop_after_attempt(4),
+        wait=wait_exponential(multiplier=1, min=1, max=16),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+
+
+@_retrying(_is_retryable_read)
+async def _graph_get(path: str, params: dict) -> dict:
     url = f"{_GRAPH}/{path.lstrip('/')}"
-    resp = requests.post(url, data=data, files=files, timeout=60)
-    result = resp.json()
-    if "error" in result:
-        raise RuntimeError(f"Graph API error: {result['error']}")
-    return result
+    resp = await _get_http().get(url, params=params)
+    return _parse_graph_response(resp)
+
+
+async def _graph_post(path: str, data: dict, files: Optional[dict] = None) -> dict:
+    url = f"{_GRAPH}/{path.lstrip('/')}"
+    resp = await _get_http().post(url, data=data, files=files, timeout=60)
+    return _parse_graph_response(resp)
+
+
+@_retrying(_is_retryable_read)
+async def _graph_batch(requests: list[dict]) -> list[dict]:
+    """
+    Run several Graph requests in one HTTP round-trip (POST / with batch=[…]).
+    Only used for reads, so it shares the GET retry policy.
+    Returns the decoded body of each request, in order.
+    """
+    resp = await _get_http().post(
+        f"{_GRAPH}/",
+        data={
+            "access_token": _app_access_token(),
+            "batch": orjson.dumps(requests).decode(),
+            "include_headers": "false",
+        },
+        timeout=60,
+    )
+    try:
+        results = resp.json()
+    except ValueError:
+        raise GraphAPIError({"message": resp.text[:200]}, resp.status_code) from None
+    if isinstance(results, dict):   # the batch itself was rejected
+        raise GraphAPIError(results.get("error", results), resp.status_code)
+
+    bodies = []
+    for item in results:
+        if item is None:   # a step whose dependency failed
+            raise GraphAPIError({"message": "Batch request was not executed."})
+        body = orjson.loads(item.get("body") or "{}")
+        if "error" in body:
+            raise GraphAPIError(body["error"], item.get("code"))
+        bodies.append(body)
+    return bodies
 
 
 # ─── Token exchange ───────────────────────────────────────────────────────────
 
-def _exchange_for_long_lived_user_token(short_token: str) -> dict:
-    """Exchange a short-lived user token for a long-lived one (60 days)."""
-    logger.info("Exchanging short-lived token for long-lived user token…")
-    data = _graph_get("oauth/access_token", {
-        "grant_type": "fb_exchange_token",
-        "client_id": FB_APP_ID,
-        "client_secret": FB_APP_SECRET,
-        "fb_exchange_token": short_token,
-    })
+def _app_access_token() -> str:
+    settings = get_settings()
+    return f"{settings.fb_app_id}|{settings.fb_app_secret.get_secret_value()}"
+
+
+def _long_lived_user_token_from(data: dict) -> dict:
     expires_in = data.get("expires_in", 60 * 24 * 3600)  # default ~60 days
     return {
         "token": data["access_token"],
@@ -95,16 +225,8 @@ def _exchange_for_long_lived_user_token(short_token: str) -> dict:
     }
 
 
-def _get_page_access_token(long_lived_user_token: str) -> dict:
-    """
-    Get a Page Access Token from a long-lived user token.
-    Page tokens obtained this way do NOT expire (no expiry field in response).
-    """
-    logger.info("Fetching Page Access Token for page %s…", FB_PAGE_ID)
-    data = _graph_get(FB_PAGE_ID, {
-        "fields": "access_token,name",
-        "access_token": long_lived_user_token,
-    })
+def _page_token_from(data: dict) -> dict:
+    # Page tokens derived from a long-lived user token do NOT expire
     page_name = data.get("name", "unknown page")
     logger.info("Got page token for: %s", page_name)
     return {
@@ -115,11 +237,48 @@ def _get_page_access_token(long_lived_user_token: str) -> dict:
     }
 
 
-def _debug_token(token: str) -> dict:
+async def _exchange_and_get_page_token(user_token: str) -> tuple[dict, dict]:
+    """
+    Exchange a (short- or long-lived) user token for a fresh long-lived one
+    (60 days) and fetch the Page Access Token derived from it – both in a
+    single Graph batch request, the page lookup chained on the exchange result.
+    Returns (long_lived_user_token_info, page_token_info).
+    """
+    settings = get_settings()
+    logger.info(
+        "Exchanging user token and fetching Page Access Token for page %s…",
+        settings.fb_page_id,
+    )
+    exchange_query = urlencode({
+        "grant_type": "fb_exchange_token",
+        "client_id": settings.fb_app_id,
+        "client_secret": settings.fb_app_secret.get_secret_value(),
+        "fb_exchange_token": user_token,
+    })
+    exchange, page = await _graph_batch([
+        {
+            "method": "GET",
+            "name": "exchange",
+            "relative_url": f"oauth/access_token?{exchange_query}",
+            "omit_response_on_success": False,   # we need expires_in from it
+        },
+        {
+            "method": "GET",
+            # JSONPath reference is resolved by Facebook – must stay unencoded
+            "relative_url": (
+                f"{settings.fb_page_id}?fields=access_token,name"
+                "&access_token={result=exchange:$.access_token}"
+            ),
+        },
+    ])
+    return _long_lived_user_token_from(exchange), _page_token_from(page)
+
+
+async def _debug_token(token: str) -> dict:
     """Inspect a token via /debug_token to get expiry and validity."""
-    data = _graph_get("debug_token", {
+    data = await _graph_get("debug_token", {
         "input_token": token,
-        "access_token": f"{FB_APP_ID}|{FB_APP_SECRET}",
+        "access_token": _app_access_token(),
     })
     return data.get("data", {})
 
@@ -139,14 +298,13 @@ def _is_token_expired(expires_at: Optional[int]) -> bool:
     return time.time() >= expires_at
 
 
-def bootstrap_tokens(initial_short_token: str) -> dict:
+async def bootstrap_tokens(initial_short_token: str) -> dict:
     """
     Full bootstrap: short-lived → long-lived user → page access token.
     Call this on first setup or when the stored tokens are invalid.
     Saves and returns the full token store.
     """
-    long_lived = _exchange_for_long_lived_user_token(initial_short_token)
-    page = _get_page_access_token(long_lived["token"])
+    long_lived, page = await _exchange_and_get_page_token(initial_short_token)
 
     tokens = {
         "user_token": long_lived,
@@ -162,14 +320,13 @@ def bootstrap_tokens(initial_short_token: str) -> dict:
     return tokens
 
 
-def _refresh_user_token(tokens: dict) -> dict:
+async def _refresh_user_token(tokens: dict) -> dict:
     """Re-exchange the stored long-lived user token for a fresh one."""
     user_token = tokens.get("user_token", {}).get("token")
     if not user_token:
         raise RuntimeError("No user token stored. Re-bootstrap required.")
     logger.info("Refreshing long-lived user token…")
-    new_long_lived = _exchange_for_long_lived_user_token(user_token)
-    new_page = _get_page_access_token(new_long_lived["token"])
+    new_long_lived, new_page = await _exchange_and_get_page_token(user_token)
     tokens["user_token"] = new_long_lived
     tokens["page_token"] = new_page
     tokens["last_refresh"] = int(time.time())
@@ -178,7 +335,7 @@ def _refresh_user_token(tokens: dict) -> dict:
     return tokens
 
 
-def ensure_valid_page_token() -> str:
+async def ensure_valid_page_token() -> str:
     """
     Return a valid page access token, refreshing if needed.
     Raises RuntimeError if tokens cannot be obtained.
@@ -187,13 +344,13 @@ def ensure_valid_page_token() -> str:
 
     # No tokens yet – need initial short-lived token from env
     if not tokens:
-        short_token = os.getenv("FB_USER_ACCESS_TOKEN", "").strip()
+        short_token = get_settings().fb_user_access_token.get_secret_value()
         if not short_token:
             raise RuntimeError(
                 "No Facebook tokens stored and FB_USER_ACCESS_TOKEN env var is empty. "
                 "Set it in .env and restart."
             )
-        tokens = bootstrap_tokens(short_token)
+        tokens = await bootstrap_tokens(short_token)
 
     user_token_info = tokens.get("user_token", {})
     page_token_info = tokens.get("page_token", {})
@@ -204,7 +361,7 @@ def ensure_valid_page_token() -> str:
     if _is_token_expired(user_expires_at) or _is_token_expiring_soon(user_expires_at):
         logger.warning("User token is expired or expiring soon. Refreshing…")
         try:
-            tokens = _refresh_user_token(tokens)
+            tokens = await _refresh_user_token(tokens)
             page_token_info = tokens["page_token"]
         except Exception as e:
             logger.error("Automatic token refresh failed: %s", e)
@@ -219,10 +376,32 @@ def ensure_valid_page_token() -> str:
     return page_token
 
 
-def validate_token_live(token: str) -> bool:
+def _token_fingerprint(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+def _is_validation_fresh(page_token: str) -> bool:
+    """True if this exact page token passed debug_token within the TTL."""
+    page_info = _load_tokens().get("page_token", {})
+    if page_info.get("token_fingerprint") != _token_fingerprint(page_token):
+        return False
+    return time.time() - page_info.get("last_validated_at", 0) < _TOKEN_VALIDATION_TTL
+
+
+def _record_validation(page_token: str) -> None:
+    tokens = _load_tokens()
+    page_info = tokens.get("page_token")
+    if not page_info or page_info.get("token") != page_token:
+        return
+    page_info["last_validated_at"] = int(time.time())
+    page_info["token_fingerprint"] = _token_fingerprint(page_token)
+    _save_tokens(tokens)
+
+
+async def validate_token_live(token: str) -> bool:
     """Debug-token call to confirm token is valid with Facebook servers."""
     try:
-        info = _debug_token(token)
+        info = await _debug_token(token)
         is_valid = info.get("is_valid", False)
         if not is_valid:
             logger.warning("Token is invalid per Facebook debug_token: %s", info)
@@ -235,35 +414,61 @@ def validate_token_live(token: str) -> bool:
 # ─── Posting ─────────────────────────────────────────────────────────────────
 
 def _load_hashtags() -> str:
-    from modules.config import HASHTAGS_FILE
-    if HASHTAGS_FILE.exists():
-        with open(HASHTAGS_FILE, "r", encoding="utf-8") as f:
-            tags = [line.strip() for line in f if line.strip()]
-        return "\n\n" + " ".join(tags)
-    logger.warning("Hashtags file not found at %s. Posting without hashtags.", HASHTAGS_FILE)
-    return ""
+    try:
+        mtime_ns = HASHTAGS_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        logger.warning("Hashtags file not found at %s. Posting without hashtags.", HASHTAGS_FILE)
+        return ""
+    return _read_hashtags(mtime_ns)
+
+
+@functools.lru_cache(maxsize=1)
+def _read_hashtags(mtime_ns: int) -> str:
+    """Build the hashtag suffix once per file version (mtime_ns is the cache key)."""
+    with open(HASHTAGS_FILE, "r", encoding="utf-8") as f:
+        tags = [line.strip() for line in f if line.strip()]
+    return "\n\n" + " ".join(tags)
+
+
+# Only retried on Graph error codes that guarantee nothing was published –
+# never on timeouts, where the photo may already be live.
+@_retrying(_is_rate_limit_error)
+async def _upload_photo(page_token: str, message: str, image: bytes, filename: str) -> dict:
+    return await _graph_post(
+        f"{get_settings().fb_page_id}/photos",
+        data={
+            "message": message,
+            "access_token": page_token,
+        },
+        files={"source": (filename, image, "image/jpeg")},
+    )
 
 
-def post_to_facebook(text: str, image_path: Path) -> str:
+async def post_to_facebook(text: str, image: bytes, filename: str) -> str:
     """
-    Post text + image to the Facebook Page.
+    Post text + image (encoded JPEG bytes) to the Facebook Page.
 
     Steps:
     1. Validate/refresh page token
-    2. Confirm token with FB debug_token
+    2. Confirm token with FB debug_token (skipped if confirmed within the last hour)
     3. Upload photo with caption via /PAGE_ID/photos
+       (on an invalid-token error, refresh tokens and retry once)
 
     Returns the Facebook post ID on success.
     """
     if not text or not text.strip():
         raise ValueError("Post text must be non-empty.")
-    if not image_path.exists():
-        raise FileNotFoundError(f"Image file not found: {image_path}")
+    if not image:
+        raise ValueError("Image data must be non-empty.")
 
     # ── Token ──────────────────────────────────────────────────────────────────
-    page_token = ensure_valid_page_token()
+    page_token = await ensure_valid_page_token()
 
-    if not validate_token_live(page_token):
+    if _is_validation_fresh(page_token):
+        logger.debug("Page token validated within the last hour; skipping debug_token.")
+    elif await validate_token_live(page_token):
+        _record_validation(page_token)
+    else:
         raise RuntimeError("Page token is invalid. Check logs and re-bootstrap.")
 
     # ── Compose message ────────────────────────────────────────────────────────
@@ -271,16 +476,17 @@ def post_to_facebook(text: str, image_path: Path) -> str:
     full_text = f"{text.strip()}\n{hashtags}".strip()
 
     # ── Upload photo ───────────────────────────────────────────────────────────
-    logger.info("Posting to Facebook Page %s…", FB_PAGE_ID)
-    with open(image_path, "rb") as img_file:
-        result = _graph_post(
-            f"{FB_PAGE_ID}/photos",
-            data={
-                "message": full_text,
-                "access_token": page_token,
-            },
-            files={"source": (image_path.name, img_file, "image/jpeg")},
-        )
+    logger.info("Posting to Facebook Page %s…", get_settings().fb_page_id)
+    try:
+        result = await _upload_photo(page_token, full_text, image, filename)
+    except GraphAPIError as e:
+        if e.code != _INVALID_TOKEN_ERROR_CODE:
+            raise
+        # Cached validation was stale – refresh (drops the cache) and retry once
+        logger.warning("Page token rejected by Facebook (%s). Refreshing and retrying once…", e)
+        tokens = await _refresh_user_token(_load_tokens())
+        page_token = tokens["page_token"]["token"]
+        result = await _upload_photo(page_token, full_text, image, filename)
 
     post_id = result.get("post_id") or result.get("id", "unknown")
     logger.info("Posted successfully. Post ID: %s", post_id)
@@ -15,13 +15,17 @@ Canvas layout (default 1080×1350, a 4:5 Facebook-friendly ratio):
 └─────────────────────────────────────┘
 """
 
+import functools
+import io
 import logging
-from pathlib import Path
-from typing import Tuple
+from typing import TYPE_CHECKING, Tuple, Union
 
-from PIL import Image, ImageDraw, ImageFont
+from modules.config import FONTS_DIR, OUTPUT_DIR, get_settings
 
-from modules.config import FONTS_DIR, OUTPUT_DIR
+# PIL is imported inside the functions so importing this module (e.g. at
+# server start-up) stays cheap until the first post image is composed.
+if TYPE_CHECKING:
+    from PIL import Image, ImageFont
 
 logger = logging.getLogger(__name__)
 
@@ -35,10 +39,16 @@ _PADDING = 60                      # outer padding (pixels)
 _LABEL_FONT_SIZE = 52
 _WORD_FONT_SIZE = 68
 _IMAGE_BOTTOM_MARGIN = 0           # image touches canvas bottom edge
+_LINE_GAP = 20                     # gap between label and word lines
+_LABEL_TEXT = "আজকের ওয়ার্ড:"
+_AI_IMAGE_FORMATS = ("WEBP", "PNG", "JPEG")   # what Replicate can return – no other codec is probed
 
 
-def _get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+@functools.lru_cache(maxsize=None)
+def _get_font(size: int, bold: bool = False) -> "ImageFont.FreeTypeFont":
     """Load NotoSansBengali from fonts/ directory; fall back to default."""
+    from PIL import ImageFont
+
     font_path = FONTS_DIR / "NotoSansBengali.ttf"
     if font_path.exists():
         try:
@@ -48,66 +58,93 @@ def _get_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
     return ImageFont.load_default()
 
 
-def _fit_image(img: Image.Image, max_w: int, max_h: int) -> Image.Image:
-    """Resize image to fit within (max_w, max_h) while preserving aspect ratio."""
-    img.thumbnail((max_w, max_h), Image.LANCZOS)
-    return img
+@functools.lru_cache(maxsize=4)
+def _get_template(canvas_w: int, canvas_h: int) -> Tuple["Image.Image", int]:
+    """
+    Background with the constant Bengali label already drawn, built once per
+    canvas size. Returns (template, y of the word line). Never draw on the
+    returned template – copy it first.
+    """
+    from PIL import Image, ImageDraw
+
+    template = Image.new("RGB", (canvas_w, canvas_h), color=_BG_COLOR)
+    draw = ImageDraw.Draw(template)
+    label_font = _get_font(_LABEL_FONT_SIZE)
+    bbox = draw.textbbox((0, 0), _LABEL_TEXT, font=label_font)
+    lw, lh = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    draw.text(((canvas_w - lw) // 2, _PADDING), _LABEL_TEXT, font=label_font, fill=_LABEL_COLOR)
+    return template, _PADDING + lh + _LINE_GAP
+
+
+def post_image_filename(word: str) -> str:
+    """File name used for the upload (and the optional debug copy)."""
+    safe_word = "".join(c for c in word if c.isalnum() or c in "-_")
+    return f"post_{safe_word}.jpg"
 
 
 def create_post_image(
-    generated_image: Image.Image,
+    generated_image: Union["Image.Image", bytes],
     word: str,
     *,
     canvas_w: int = _CANVAS_W,
     canvas_h: int = _CANVAS_H,
-) -> Path:
+) -> bytes:
     """
     Composite the AI image onto a vertical canvas with the Bengali word label.
 
     Args:
-        generated_image: PIL Image from Gemini.
+        generated_image: The AI image – a PIL Image, or the encoded file as
+            returned by Replicate (decoded here, i.e. in the compositing
+            worker process, and never in the event loop).
         word: The English vocabulary word (e.g. "Ephemeral").
 
     Returns:
-        Path to the saved output image.
+        The encoded JPEG. A copy is written to output/ only when
+        DEBUG_SAVE_IMAGES=1.
     """
     if not word:
         raise ValueError("'word' must be non-empty.")
 
-    canvas = Image.new("RGB", (canvas_w, canvas_h), color=_BG_COLOR)
-    draw = ImageDraw.Draw(canvas)
-
-    # ── Fonts ──────────────────────────────────────────────────────────────────
-    label_font = _get_font(_LABEL_FONT_SIZE)   # "আজকের ওয়ার্ড:"
-    word_font = _get_font(_WORD_FONT_SIZE)     # the English word
-
-    # ── Measure text heights ───────────────────────────────────────────────────
-    def text_size(text: str, font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
-        bbox = draw.textbbox((0, 0), text, font=font)
-        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+    from PIL import Image, ImageDraw
 
-    label_text = "আজকের ওয়ার্ড:"
-    lw, lh = text_size(label_text, label_font)
-    ww, wh = text_size(word.upper(), word_font)
+    if isinstance(generated_image, bytes):
+        # open() only parses the header; pixels are decoded on first use below
+        generated_image = Image.open(io.BytesIO(generated_image), formats=_AI_IMAGE_FORMATS)
 
-    total_text_h = lh + 20 + wh   # 20px gap between two text lines
-
-    # ── Place text centred at top (with padding) ───────────────────────────────
-    text_top = _PADDING
+    template, word_y = _get_template(canvas_w, canvas_h)
+    canvas = template.copy()
+    draw = ImageDraw.Draw(canvas)
 
-    label_x = (canvas_w - lw) // 2
-    draw.text((label_x, text_top), label_text, font=label_font, fill=_LABEL_COLOR)
+    # ── Word line (the label is already on the template) ──────────────────────
+    # The only per-post layout: one measurement of the exact string drawn.
+    word_text = word.capitalize()
+    word_font = _get_font(_WORD_FONT_SIZE)
+    bbox = draw.textbbox((0, 0), word_text, font=word_font)
+    ww, wh = bbox[2] - bbox[0], bbox[3] - bbox[1]
 
     word_x = (canvas_w - ww) // 2
-    word_y = text_top + lh + 20
-    draw.text((word_x, word_y), word.capitalize(), font=word_font, fill=_WORD_COLOR)
+    draw.text((word_x, word_y), word_text, font=word_font, fill=_WORD_COLOR)
 
     # ── Place generated image below the text block ─────────────────────────────
-    image_top = text_top + total_text_h + _PADDING   # gap after text block
+    image_top = word_y + wh + _PADDING               # gap after text block
     max_img_h = canvas_h - image_top
     max_img_w = canvas_w                              # full width, no side margins
 
-    ai_img = _fit_image(generated_image.copy(), max_img_w, max_img_h)
+    if generated_image.mode != "RGB":
+        generated_image = generated_image.convert("RGB")
+
+    # Fit within (max_img_w, max_img_h) preserving aspect ratio, never upscale.
+    # resize() returns a new image, so the source needs no defensive copy;
+    # reducing_gap does a cheap integer reduce() first when shrinking a lot.
+    scale = min(max_img_w / generated_image.width, max_img_h / generated_image.height, 1.0)
+    if scale < 1.0:
+        new_w = max(1, int(generated_image.width * scale))
+        new_h = max(1, int(generated_image.height * scale))
+        ai_img = generated_image.resize(
+            (new_w, new_h), Image.Resampling.LANCZOS, reducing_gap=2.0
+        )
+    else:
+        ai_img = generated_image
     img_x = (canvas_w - ai_img.width) // 2           # centre (handles non-square images)
     img_y = canvas_h - ai_img.height                 # anchor to bottom edge
 
@@ -117,9 +154,23 @@ def create_post_image(
 
     canvas.paste(ai_img, (img_x, img_y))
 
-    # ── Save ───────────────────────────────────────────────────────────────────
-    safe_word = "".join(c for c in word if c.isalnum() or c in "-_")
-    output_path = OUTPUT_DIR / f"post_{safe_word}.jpg"
-    canvas.save(output_path, format="JPEG", quality=92, optimize=True)
-    logger.info("Post image saved: %s (%dx%d)", output_path, canvas_w, canvas_h)
-    return output_path
+    # ── Encode ─────────────────────────────────────────────────────────────────
+    # Single-pass baseline encode – optimize=True costs a second Huffman pass
+    # for a marginally smaller file. subsampling=2 is 4:2:0 chroma.
+    buffer = io.BytesIO()
+    canvas.save(
+        buffer,
+        format="JPEG",
+        quality=90,
+        optimize=False,
+        progressive=False,
+        subsampling=2,
+    )
+    data = buffer.getvalue()
+    logger.info("Post image encoded (%dx%d, %d KB).", canvas_w, canvas_h, len(data) // 1024)
+
+    if get_settings().debug_save_images:
+        output_path = OUTPUT_DIR / post_image_filename(word)
+        output_path.write_bytes(data)
+        logger.info("Post image saved: %s", output_path)
+    return data
@@ -0,0 +1,75 @@
+"""
+LLM cache – exact-match store for generated texts (post texts, image prompts).
+
+Re-posting a word (manual re-trigger, retry, next pass through the word list)
+returns the stored output instead of paying for another LLM call.
+Keys include prompts.PROMPT_VERSION, so bumping it invalidates everything.
+Backed by data/llm_cache.sqlite; entries expire after 3 years – longer than
+one pass through the word list (~4000 words at 6 posts a day ≈ 670 days).
+Cache failures are logged and ignored – they never break the workflow.
+
+Images are not cached: at 1-2 MB each a full pass would not fit, and the
+retries that matter (a slot's upload failing) reuse the pre-generated image.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from typing import Optional
+
+from modules.config import LLM_CACHE_FILE
+
+logger = logging.getLogger(__name__)
+
+_TTL_SECONDS = 3 * 365 * 24 * 3600   # must outlast a full word-list cycle
+
+
+def make_key(*parts: str) -> str:
+    """Stable cache key from the inputs that determine an LLM output."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(LLM_CACHE_FILE, timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS llm_cache ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at INTEGER NOT NULL)"
+    )
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'blob_cache'"
+    ).fetchone():
+        # Former image cache – drop it and give the space back (once)
+        conn.execute("DROP TABLE blob_cache")
+        conn.execute("VACUUM")
+    return conn
+
+
+def get(key: str) -> Optional[str]:
+    """Return the cached value, or None on miss / expiry / cache error."""
+    try:
+        with closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("LLM cache read failed (%s). Ignoring cache.", e)
+        return None
+    if row is None or time.time() - row[1] > _TTL_SECONDS:
+        return None
+    return row[0]
+
+
+def put(key: str, value: str) -> None:
+    """Store a value and drop expired entries."""
+    now = int(time.time())
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, now),
+            )
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - _TTL_SECONDS,))
+    except sqlite3.Error as e:
+        logger.warning("LLM cache write failed (%s).", e)
@@ -10,90 +10,117 @@ Image prompt generation always uses GPT (no need to switch).
 
 import logging
 import re
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import anthropic
+import orjson
 from openai import OpenAI, APIError, RateLimitError, APITimeoutError
 
-from modules.config import (
-    OPENAI_API_KEY,
-    ANTHROPIC_API_KEY,
-    TEXT_GENERATION_PROVIDER,
-)
+from modules import llm_cache
+from modules.config import get_settings
 from modules.prompts import (
+    PROMPT_VERSION,
     TEXT_GENERATION_SYSTEM_PROMPT,
-    TEXT_GENERATION_USER_PROMPT,
+    TEXT_GENERATION_STATIC_PREFIX,
+    TEXT_GENERATION_DYNAMIC_SUFFIX,
+    TEXT_GENERATION_BATCH_DYNAMIC_SUFFIX,
     IMAGE_PROMPT_SYSTEM_PROMPT,
-    IMAGE_PROMPT_USER_PROMPT,
+    IMAGE_PROMPT_STATIC_PREFIX,
+    IMAGE_PROMPT_DYNAMIC_SUFFIX,
 )
 
+if TYPE_CHECKING:
+    import anthropic
+
 logger = logging.getLogger(__name__)
 
+_GPT_MODEL = "gpt-4o-mini"
+_CLAUDE_MODEL = "claude-sonnet-4-5-20250929"
+_SDK_MAX_RETRIES = 3   # SDKs back off on connection errors, 408/409/429 and 5xx
+
+# Output caps – decode time grows with output length, so bound it.
+# Claude's tokenizer splits Bengali into far more tokens than GPT-4o's.
+_GPT_TEXT_MAX_TOKENS = 350
+_CLAUDE_TEXT_MAX_TOKENS = 1024
+_IMAGE_PROMPT_MAX_TOKENS = 180
+
+# System message = system prompt + all static instructions: one identical
+# prefix on every call, so provider-side prompt caching can reuse it.
+_TEXT_SYSTEM = f"{TEXT_GENERATION_SYSTEM_PROMPT.strip()}\n\n{TEXT_GENERATION_STATIC_PREFIX.strip()}"
+_IMAGE_SYSTEM = f"{IMAGE_PROMPT_SYSTEM_PROMPT.strip()}\n\n{IMAGE_PROMPT_STATIC_PREFIX.strip()}"
+
 # ─── Unicode bold converter ───────────────────────────────────────────────────
+# Only Latin A-Z, a-z and digits 0-9 have Mathematical Bold equivalents.
+_BOLD_TABLE: dict[int, int] = {
+    **{ord("A") + i: 0x1D400 + i for i in range(26)},  # bold uppercase A
+    **{ord("a") + i: 0x1D41A + i for i in range(26)},  # bold lowercase a
+    **{ord("0") + i: 0x1D7CE + i for i in range(10)},  # bold digit 0
+}
+_BOLD_RE = re.compile(r"\*\*(.*?)\*\*", re.DOTALL)
+_HEADING_LINE_RE = re.compile(r"^#+[^\n]*\n?", re.MULTILINE)
+
 
 def _apply_unicode_bold(text: str) -> str:
     """
     Replace **word** markers with Unicode Mathematical Bold characters.
-    Only Latin A-Z, a-z and digits 0-9 have bold Unicode equivalents.
     Bengali and other scripts are left unchanged inside the markers.
     """
-    _U = 0x1D400  # bold uppercase A
-    _L = 0x1D41A  # bold lowercase a
-    _D = 0x1D7CE  # bold digit 0
-
-    def _to_bold(s: str) -> str:
-        out = []
-        for ch in s:
-            if "A" <= ch <= "Z":
-                out.append(chr(_U + ord(ch) - ord("A")))
-            elif "a" <= ch <= "z":
-                out.append(chr(_L + ord(ch) - ord("a")))
-            elif "0" <= ch <= "9":
-                out.append(chr(_D + ord(ch) - ord("0")))
-            else:
-                out.append(ch)
-        return "".join(out)
-
-    return re.sub(r"\*\*(.*?)\*\*", lambda m: _to_bold(m.group(1)), text, flags=re.DOTALL)
+    return _BOLD_RE.sub(lambda m: m.group(1).translate(_BOLD_TABLE), text)
 
 
 # ─── Lazy clients ─────────────────────────────────────────────────────────────
 _openai_client: Optional[OpenAI] = None
-_anthropic_client: Optional[anthropic.Anthropic] = None
+_anthropic_client: Optional["anthropic.Anthropic"] = None
 
 
 def _get_openai() -> OpenAI:
     global _openai_client
     if _openai_client is None:
-        _openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        _openai_client = OpenAI(
+            api_key=get_settings().openai_api_key.get_secret_value(),
+            max_retries=_SDK_MAX_RETRIES,
+        )
     return _openai_client
 
 
-def _get_anthropic() -> anthropic.Anthropic:
+def _get_anthropic() -> "anthropic.Anthropic":
     global _anthropic_client
     if _anthropic_client is None:
-        if not ANTHROPIC_API_KEY:
+        api_key = get_settings().anthropic_api_key.get_secret_value()
+        if not api_key:
             raise RuntimeError(
                 "ANTHROPIC_API_KEY is not set but TEXT_GENERATION_PROVIDER=claude."
             )
-        _anthropic_client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        import anthropic  # imported only when Claude is actually used
+        _anthropic_client = anthropic.Anthropic(api_key=api_key, max_retries=_SDK_MAX_RETRIES)
     return _anthropic_client
 
 
 # ─── GPT ──────────────────────────────────────────────────────────────────────
 
-def _call_gpt(system_prompt: str, user_prompt: str, label: str) -> str:
+def _call_gpt(
+    system_prompt: str,
+    user_prompt: str,
+    label: str,
+    max_tokens: Optional[int] = None,
+    json_output: bool = False,
+) -> str:
     client = _get_openai()
     logger.info("GPT-4o mini call: %s", label)
     try:
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=_GPT_MODEL,
+            # Static system message first → OpenAI caches identical prefixes
+            # automatically (from 1024 tokens); only the user message varies.
             messages=[
                 {"role": "system", "content": system_prompt.strip()},
                 {"role": "user", "content": user_prompt.strip()},
             ],
-            response_format={"type": "text"},
+            response_format={"type": "json_object" if json_output else "text"},
+            max_tokens=max_tokens,
         )
+        if response.choices[0].finish_reason == "length":
+            # A cut-off reply is a failed generation – never publish or cache it
+            raise RuntimeError(f"GPT output hit max_tokens={max_tokens} for '{label}' – truncated.")
         content = response.choices[0].message.content
         if not content:
             raise RuntimeError(f"GPT returned empty content for '{label}'.")
@@ -110,16 +137,25 @@ def _call_gpt(system_prompt: str, user_prompt: str, label: str) -> str:
 
 # ─── Claude ───────────────────────────────────────────────────────────────────
 
-def _call_claude(system_prompt: str, user_prompt: str, label: str) -> str:
+def _call_claude(system_prompt: str, user_prompt: str, label: str, max_tokens: int) -> str:
+    import anthropic
     client = _get_anthropic()
     logger.info("Claude call: %s", label)
     try:
         message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2048,
-            system=system_prompt.strip(),
+            model=_CLAUDE_MODEL,
+            max_tokens=max_tokens,
+            # Mark the system prompt as a cacheable prefix (prompt caching)
+            system=[{
+                "type": "text",
+                "text": system_prompt.strip(),
+                "cache_control": {"type": "ephemeral"},
+            }],
             messages=[{"role": "user", "content": user_prompt.strip()}],
         )
+        if message.stop_reason == "max_tokens":
+            # A cut-off reply is a failed generation – never publish or cache it
+            raise RuntimeError(f"Claude output hit max_tokens={max_tokens} for '{label}' – truncated.")
         content = message.content[0].text
         if not content:
             raise RuntimeError(f"Claude returned empty content for '{label}'.")
@@ -134,6 +170,71 @@ def _call_claude(system_prompt: str, user_prompt: str, label: str) -> str:
         raise RuntimeError(f"Claude API error during '{label}'.") from e
 
 
+# ─── Post-processing ──────────────────────────────────────────────────────────
+
+def _finish_post_text(raw: str) -> str:
+    """Drop markdown heading lines and turn **word** markers into Unicode bold."""
+    raw = _HEADING_LINE_RE.sub("", raw.strip())  # drop lines starting with #
+    return _apply_unicode_bold(raw.strip())
+
+
+def _parse_batch_posts(raw: str) -> list:
+    """Extract the "posts" array from a batch reply (tolerates ```json fences)."""
+    start, end = raw.find("{"), raw.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("no JSON object in batch reply")
+    posts = orjson.loads(raw[start:end + 1]).get("posts")
+    if not isinstance(posts, list):
+        raise ValueError("batch reply has no 'posts' array")
+    return posts
+
+
+def _post_text_cache_key(word: str) -> str:
+    """Cache key of a word's post text – shared by the single and batched calls."""
+    provider = get_settings().text_generation_provider
+    model = _CLAUDE_MODEL if provider == "claude" else _GPT_MODEL
+    return llm_cache.make_key(
+        PROMPT_VERSION, provider, model, _TEXT_SYSTEM, TEXT_GENERATION_DYNAMIC_SUFFIX, word.strip().lower()
+    )
+
+
+def _generate_post_texts_batch(words: list[str]) -> list[str]:
+    """One batched LLM call for `words` (all cache misses); caches each text."""
+    system = _TEXT_SYSTEM
+    user = TEXT_GENERATION_BATCH_DYNAMIC_SUFFIX.format(words_json=orjson.dumps(words).decode())
+    label = f"generate_post_texts({len(words)} words)"
+
+    posts: list = []
+    try:
+        if get_settings().text_generation_provider == "claude":
+            raw = _call_claude(system, user, label, _CLAUDE_TEXT_MAX_TOKENS * len(words))
+        else:
+            # + a little per post for the JSON wrapping and escaped line breaks
+            raw = _call_gpt(
+                system, user, label, (_GPT_TEXT_MAX_TOKENS + 50) * len(words), json_output=True
+            )
+        posts = _parse_batch_posts(raw)
+    except (RuntimeError, ValueError) as e:
+        logger.warning("Batch generation failed (%s). Falling back to one call per word.", e)
+
+    texts = []
+    for i, word in enumerate(words):
+        item = posts[i] if i < len(posts) else None
+        if (
+            isinstance(item, dict)
+            and str(item.get("word", "")).strip().lower() == word.lower()
+            and isinstance(item.get("post"), str)
+            and item["post"].strip()
+        ):
+            text = _finish_post_text(item["post"])
+            llm_cache.put(_post_text_cache_key(word), text)
+            texts.append(text)
+        else:
+            logger.warning("Batch reply has no usable post for '%s'. Generating it alone.", word)
+            texts.append(generate_post_text(word))
+    return texts
+
+
 # ─── Public API ────────────────────────────────────────────────────────────────
 
 def generate_post_text(word: str) -> str:
@@ -144,29 +245,68 @@ def generate_post_text(word: str) -> str:
     if not word or not word.strip():
         raise ValueError("'word' must be a non-empty string.")
 
-    system = TEXT_GENERATION_SYSTEM_PROMPT
-    user = TEXT_GENERATION_USER_PROMPT.format(word=word.strip())
+    system = _TEXT_SYSTEM
+    user = TEXT_GENERATION_DYNAMIC_SUFFIX.format(word=word.strip())
     label = f"generate_post_text({word})"
 
-    if TEXT_GENERATION_PROVIDER == "claude":
-        raw = _call_claude(system, user, label).strip()
+    cache_key = _post_text_cache_key(word)
+    cached = llm_cache.get(cache_key)
+    if cached:
+        logger.info("LLM cache hit: %s", label)
+        return cached
+
+    if get_settings().text_generation_provider == "claude":
+        raw = _call_claude(system, user, label, _CLAUDE_TEXT_MAX_TOKENS).strip()
     else:
-        raw = _call_gpt(system, user, label).strip()
-    raw = re.sub(r"^#+[^\n]*\n?", "", raw, flags=re.MULTILINE)  # drop lines starting with #
-    return _apply_unicode_bold(raw.strip())
+        raw = _call_gpt(system, user, label, _GPT_TEXT_MAX_TOKENS).strip()
+    text = _finish_post_text(raw)
+    llm_cache.put(cache_key, text)
+    return text
 
 
-def generate_image_prompt(post_text: str, word: str) -> str:
+def generate_post_texts(words: list[str]) -> list[str]:
+    """
+    Generate post texts for several words with a single LLM call.
+    Used by the daily pre-generation run. Returns one text per word, in order.
+    Words with a cached text (same cache as generate_post_text()) are not
+    sent; each new text is cached. Any word the batch reply misses or mangles
+    is regenerated on its own through generate_post_text().
     """
-    Generate an image-generation prompt from the post text and word.
+    words = [w.strip() for w in words]
+    if not words or not all(words):
+        raise ValueError("'words' must be a non-empty list of non-empty strings.")
+
+    cached = [llm_cache.get(_post_text_cache_key(w)) for w in words]
+    misses = list(dict.fromkeys(w for w, text in zip(words, cached) if not text))
+    if len(words) > len(misses):
+        logger.info("LLM cache hit: %d of %d batch post(s)", len(words) - len(misses), len(words))
+    if len(misses) <= 1:
+        return [text or generate_post_text(w) for w, text in zip(words, cached)]
+    fresh = dict(zip(misses, _generate_post_texts_batch(misses)))
+    return [text or fresh[w] for w, text in zip(words, cached)]
+
+
+def generate_image_prompt(word: str) -> str:
+    """
+    Generate an image-generation prompt from the word alone.
+    Independent of the post text, so it can run alongside generate_post_text().
     Always uses GPT-4o mini.
     """
-    if not post_text or not post_text.strip():
-        raise ValueError("'post_text' must be a non-empty string.")
     if not word or not word.strip():
         raise ValueError("'word' must be a non-empty string.")
 
-    system = IMAGE_PROMPT_SYSTEM_PROMPT
-    user = IMAGE_PROMPT_USER_PROMPT.format(word=word.strip(), post_text=post_text.strip())
-
-    return _call_gpt(system, user, "generate_image_prompt").strip()
\ No newline at end of file
+    system = _IMAGE_SYSTEM
+    user = IMAGE_PROMPT_DYNAMIC_SUFFIX.format(word=word.strip())
+    label = f"generate_image_prompt({word})"
+
+    cache_key = llm_cache.make_key(
+        PROMPT_VERSION, _GPT_MODEL, system, IMAGE_PROMPT_DYNAMIC_SUFFIX, word.strip().lower()
+    )
+    cached = llm_cache.get(cache_key)
+    if cached:
+        logger.info("LLM cache hit: %s", label)
+        return cached
+
+    prompt = _call_gpt(system, user, label, _IMAGE_PROMPT_MAX_TOKENS).strip()
+    llm_cache.put(cache_key, prompt)
+    return prompt
@@ -0,0 +1,233 @@
+"""
+Pre-generated posts – one JSON file (+ one JPEG) per posting slot in data/generated/.
+
+A slot is a posting date + hour in the scheduler's timezone, e.g.
+"2025-03-14-08". The daily off-peak pre-generation run reserves the words
+for all of the day's slots, writes their post texts with a single batched
+LLM call, then generates each image prompt, AI image and the final composed
+post image. The trigger for a slot then only reads its files and uploads.
+
+Entry format (YYYY-MM-DD-HH.json, post image in YYYY-MM-DD-HH.jpg):
+  {"slot": "2025-03-14-08", "word": "abjure", "post_text": "…" | null,
+   "image_prompt": "…" | null, "created_at": 1710374400, "post_id": null}
+
+Any part that failed to generate is simply missing (null / no .jpg) – the
+trigger then generates that part live, so the word order is never disturbed.
+Slots that were already posted (post_id set) are never generated again.
+Files older than 7 days are pruned on each pre-generation run.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+import orjson
+
+from modules.config import GENERATED_DIR
+from modules.openai_client import generate_image_prompt, generate_post_texts
+from modules.word_manager import selectNextWord
+
+logger = logging.getLogger(__name__)
+
+_KEEP_DAYS = 7
+_SLOT_RE = re.compile(r"^\d{4}-\d{2}-\d{2}-\d{2}$")
+
+# Reserving a slot's word is check → select → save; two triggers for the same
+# slot (two workers, or pre-generation racing a trigger) must not both select
+_ENTRY_LOCK = threading.Lock()
+_ENTRY_LOCK_FILE = GENERATED_DIR / ".entries.lock"
+
+
+def slot_key(day: date, hour: int) -> str:
+    """Slot name for a posting date + hour (24 h clock)."""
+    if not 0 <= hour <= 23:
+        raise ValueError(f"hour must be 0-23, got {hour}.")
+    return f"{day.isoformat()}-{hour:02d}"
+
+
+def parse_slot(slot: str) -> tuple[date, int]:
+    """Posting date + hour of a slot name. ValueError unless it is a real date and hour."""
+    if _SLOT_RE.match(slot):
+        try:
+            parsed = datetime.strptime(slot, "%Y-%m-%d-%H")
+        except ValueError:
+            pass
+        else:
+            return parsed.date(), parsed.hour
+    raise ValueError(f"Invalid slot '{slot}' (expected YYYY-MM-DD-HH with a real date and hour).")
+
+
+def _path(slot: str, suffix: str = ".json") -> Path:
+    # The slot ends up in a file name and arrives from a query string – validate
+    parse_slot(slot)
+    return GENERATED_DIR / f"{slot}{suffix}"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write temp + rename, so a reader never sees a half-written file."""
+    fd, tmp_path = tempfile.mkstemp(dir=GENERATED_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def load_entry(slot: str) -> Optional[dict]:
+    """Return the stored entry for a slot, or None if there is none / it is unreadable."""
+    path = _path(slot)
+    try:
+        return orjson.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (orjson.JSONDecodeError, OSError) as e:
+        logger.warning("Pre-generated entry %s unreadable (%s). Ignoring it.", path.name, e)
+        return None
+
+
+def _new_entry(slot: str, word: str) -> dict:
+    """A fresh entry with the word reserved and nothing generated yet."""
+    return {
+        "slot": slot,
+        "word": word,
+        "post_text": None,
+        "image_prompt": None,
+        "created_at": int(time.time()),
+        "post_id": None,
+    }
+
+
+@contextmanager
+def _entries_locked() -> Iterator[None]:
+    """Hold the entry lock for this thread and for every other worker process."""
+    with _ENTRY_LOCK, open(_ENTRY_LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def reserve_entry(slot: str) -> dict:
+    """
+    Return the slot's entry, creating it with the next word if there is none.
+    Atomic across threads and worker processes: every caller for a slot gets
+    the same word, and only one word is taken from the list.
+    """
+    with _entries_locked():
+        entry = load_entry(slot)
+        if entry is None:
+            entry = _new_entry(slot, selectNextWord())
+            save_entry(entry)
+    return entry
+
+
+def save_entry(entry: dict) -> None:
+    """Atomically write an entry."""
+    _write_atomic(_path(entry["slot"]), orjson.dumps(entry, option=orjson.OPT_INDENT_2))
+
+
+def load_image(slot: str) -> Optional[bytes]:
+    """Return the composed post image (JPEG) for a slot, or None if there is none."""
+    try:
+        return _path(slot, ".jpg").read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _prune(today: date) -> None:
+    cutoff = (today - timedelta(days=_KEEP_DAYS)).isoformat()
+    for path in GENERATED_DIR.iterdir():
+        if _SLOT_RE.match(path.stem) and path.stem[:10] < cutoff:
+            path.unlink(missing_ok=True)
+
+
+def _prepare_texts(day: date, hours: list[int]) -> list[dict]:
+    """Reserve the words of slots without an entry, then batch-generate missing texts."""
+    _prune(day)
+    slots = [slot_key(day, h) for h in sorted(set(hours))]
+    entries = {slot: load_entry(slot) for slot in slots}
+
+    # Reserve the words first and persist them, so a failed LLM call
+    # never makes the word list skip ahead.
+    for slot in [slot for slot, entry in entries.items() if entry is None]:
+        entries[slot] = reserve_entry(slot)
+
+    pending = [
+        entries[slot] for slot in slots
+        if not entries[slot].get("post_text") and not entries[slot].get("post_id")
+    ]
+    if pending:
+        try:
+            texts = generate_post_texts([e["word"] for e in pending])
+        except Exception as e:
+            logger.error("Pre-generation of %d post(s) failed: %s", len(pending), e)
+        else:
+            for entry, text in zip(pending, texts):
+                entry["post_text"] = text
+                save_entry(entry)
+            logger.info("Pre-generated %d post(s) for %s.", len(pending), day.isoformat())
+
+    return [entries[slot] for slot in slots]
+
+
+async def _pregenerate_image(entry: dict, image_executor: Optional[Executor]) -> bool:
+    """Image prompt → AI image → composed post image, for one entry. True if stored."""
+    # Replicate SDK + PIL are only needed here – keep them off the boot path
+    from modules.image_processor import create_post_image
+    from modules.replicate_client import generate_image_bytes
+
+    path = _path(entry["slot"], ".jpg")
+    if path.exists():
+        return True
+    try:
+        if not entry.get("image_prompt"):
+            entry["image_prompt"] = await asyncio.to_thread(generate_image_prompt, entry["word"])
+            await asyncio.to_thread(save_entry, entry)
+        image, _ = await generate_image_bytes(entry["image_prompt"])
+        # CPU-bound – on the caller's process pool (None: a thread of this process)
+        jpeg = await asyncio.get_running_loop().run_in_executor(
+            image_executor, create_post_image, image, entry["word"]
+        )
+        await asyncio.to_thread(_write_atomic, path, jpeg)
+    except Exception as e:
+        logger.error("Pre-generating the image for %s failed: %s", entry["slot"], e)
+        return False
+    logger.info("Pre-generated post image for %s ('%s').", entry["slot"], entry["word"])
+    return True
+
+
+async def pregenerate(
+    day: date, hours: list[int], image_executor: Optional[Executor] = None
+) -> list[dict]:
+    """
+    Reserve the next word for each slot of `day` that has no entry yet,
+    generate all their post texts with one batched LLM call, then the post
+    images of the slots that have none (concurrently). Parts that already
+    exist, and slots that were already posted, are kept as they are.
+    Post images are composed on `image_executor` (the default thread pool
+    if None).
+    Returns the entries of every requested slot (existing and new), each
+    with "image_ready" telling whether its post image is stored.
+    """
+    entries = await asyncio.to_thread(_prepare_texts, day, hours)
+    todo = [e for e in entries if not e.get("post_id")]
+    ready = dict(zip(
+        (e["slot"] for e in todo),
+        await asyncio.gather(*(_pregenerate_image(e, image_executor) for e in todo)),
+    ))
+    return [
+        {**entry, "image_ready": ready.get(entry["slot"], False)} for entry in entries
+    ]
@@ -0,0 +1,77 @@
+"""
+Prompt templates for all LLM calls – the single source for every caller
+(openai_client for the texts, llm_cache keys via PROMPT_VERSION). Do not copy templates into other modules.
+
+The templates themselves live next to this file as UTF-8 .txt files and are
+read on first access (module __getattr__ + lru_cache), so importing the
+package costs nothing and long templates / few-shot examples can be edited
+without touching Python source. `from modules.prompts import X` works as
+before.
+
+Variables are inserted with Python's str.format() – use {word}, {words_json}.
+
+Each call is split into a static part and a dynamic part: the system prompt
+plus the *_STATIC_PREFIX instructions form the system message, and only the
+short *_DYNAMIC_SUFFIX (the variables) goes into the user message. Providers
+cache on exact prefix matches, so everything but that tail is a cache hit.
+Never put a variable into a static block.
+"""
+
+from functools import lru_cache
+from importlib.resources import files
+
+__all__ = [
+    "PROMPT_VERSION",
+    "ENGLISH_EXAMPLES_HEADER",
+    "TEXT_GENERATION_SYSTEM_PROMPT",
+    "TEXT_GENERATION_STATIC_PREFIX",
+    "TEXT_GENERATION_DYNAMIC_SUFFIX",
+    "TEXT_GENERATION_BATCH_DYNAMIC_SUFFIX",
+    "IMAGE_PROMPT_SYSTEM_PROMPT",
+    "IMAGE_PROMPT_STATIC_PREFIX",
+    "IMAGE_PROMPT_DYNAMIC_SUFFIX",
+]
+
+# Part of every generation cache key – bump it after editing any template so
+# cached texts and image prompts made with the old wording are dropped.
+PROMPT_VERSION = "3"
+
+# Literal line that opens the English examples block of every post
+ENGLISH_EXAMPLES_HEADER = "📝 English examples:"
+
+# Template name → resource file.
+#   Call #1  – Bengali post text. Input variable: {word}
+#   Call #1 (batch) – post texts for several words at once, used by the daily
+#              pre-generation run. Input variable: {words_json}, a JSON array
+#              like ["abjure", "ephemeral"]. Same system message as Call #1,
+#              so both share the cached prefix.
+#   Call #2  – image generation prompt. Input variable: {word}. Word-only, so
+#              it runs concurrently with Call #1.
+_FILES = {
+    "TEXT_GENERATION_SYSTEM_PROMPT": "text_system.txt",
+    "TEXT_GENERATION_STATIC_PREFIX": "text_static_prefix.txt",
+    "TEXT_GENERATION_DYNAMIC_SUFFIX": "text_dynamic_suffix.txt",
+    "TEXT_GENERATION_BATCH_DYNAMIC_SUFFIX": "text_batch_dynamic_suffix.txt",
+    "IMAGE_PROMPT_SYSTEM_PROMPT": "image_system.txt",
+    "IMAGE_PROMPT_STATIC_PREFIX": "image_static_prefix.txt",
+    "IMAGE_PROMPT_DYNAMIC_SUFFIX": "image_dynamic_suffix.txt",
+}
+
+
+@lru_cache(maxsize=None)
+def _load(name: str) -> str:
+    text = files(__name__).joinpath(_FILES[name]).read_text(encoding="utf-8")
+    if name == "TEXT_GENERATION_STATIC_PREFIX":
+        # Static blocks are never .format()ted by callers – fill the header in here
+        text = text.replace("{ENGLISH_EXAMPLES_HEADER}", ENGLISH_EXAMPLES_HEADER)
+    return text
+
+
+def __getattr__(name: str) -> str:
+    if name in _FILES:
+        return _load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_FILES))
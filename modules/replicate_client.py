@@ -3,20 +3,19 @@ Replicate image generation client.
 Model: bytedance/sdxl-lightning-4step
 Version: 5599ed30703defd1d160a25a63321b4dec97101d98b4674bcc56e41f62f35637
 
-SDXL-Lightning produces 1024×1024 images in 4 steps (very fast).
+SDXL-Lightning produces 1024×1024 images in 4 steps (very fast), returned as
+PNG; the format is detected from the file itself.
 """
 
-import io
 import logging
 import os
 
 import replicate
-from PIL import Image
 
-from modules.config import REPLICATE_API_TOKEN
+from modules.config import get_settings
 
 # Ensure token is in environment for the replicate client to find automatically
-os.environ["REPLICATE_API_TOKEN"] = REPLICATE_API_TOKEN
+os.environ["REPLICATE_API_TOKEN"] = get_settings().replicate_api_token.get_secret_value()
 
 logger = logging.getLogger(__name__)
 
@@ -24,17 +23,31 @@ logger = logging.getLogger(__name__)
 _MODEL = "bytedance/sdxl-lightning-4step:5599ed30703defd1d160a25a63321b4dec97101d98b4674bcc56e41f62f35637"
 
 
-def generate_image(prompt: str) -> Image.Image:
+def _content_type(data: bytes) -> str:
+    """MIME type of an encoded image, from its magic bytes."""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+async def generate_image_bytes(prompt: str) -> tuple[bytes, str]:
     """
     Generate an image via Replicate (SDXL-Lightning 4-step).
+    Uses the SDK's async client – the prediction is awaited, no thread is
+    blocked while SDXL runs or while the file downloads.
 
     Args:
         prompt: Image generation prompt string.
 
     Returns:
-        PIL Image (RGB).
+        (encoded image file, content type) – not decoded; callers that need
+        pixels decode it where the work belongs (e.g. the compositing process).
     Raises:
-        RuntimeError on API or decoding failure.
+        RuntimeError on API failure.
     """
     if not prompt or not prompt.strip():
         raise ValueError("Image generation prompt must be non-empty.")
@@ -42,8 +55,8 @@ def generate_image(prompt: str) -> Image.Image:
     logger.info("Replicate image generation started. Prompt: %s...", prompt[:80])
 
     try:
-        # replicate.run returns a list of FileOutput objects
-        output = replicate.run(
+        # replicate.async_run returns a list of FileOutput objects
+        output = await replicate.async_run(
             _MODEL,
             input={
                 "prompt": prompt.strip(),
@@ -59,13 +72,15 @@ def generate_image(prompt: str) -> Image.Image:
         if not output:
             raise RuntimeError("Replicate returned empty output.")
 
-        # Modern replicate-python returns FileOutput objects; read() gets bytes directly
-        image_data: bytes = output[0].read()
-
-        img = Image.open(io.BytesIO(image_data)).convert("RGB")
-        logger.info("Replicate image generated (%dx%d).", img.width, img.height)
-        return img
+        # Modern replicate-python returns FileOutput objects; aread() gets bytes directly
+        image_data: bytes = await output[0].aread()
+        if not image_data:
+            raise RuntimeError("Replicate returned an empty file.")
 
     except Exception as e:
         logger.error("Replicate image generation failed: %s", e)
-        raise RuntimeError(f"Image generation failed: {e}") from e
\ No newline at end of file
+        raise RuntimeError(f"Image generation failed: {e}") from e
+
+    content_type = _content_type(image_data)
+    logger.info("Replicate image generated (%d KB, %s).", len(image_data) // 1024, content_type)
+    return image_data, content_type
@@ -5,64 +5,137 @@ State is persisted in data/state.json so restarts are safe.
 Atomic writes (write-then-rename) prevent corruption on crashes.
 """
 
-import json
+import fcntl
 import logging
 import os
 import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
 from pathlib import Path
-from typing import List
+from typing import Any, Iterator, Optional
+
+import orjson
 
 from modules.config import STATE_FILE, WORDS_FILE
 
 logger = logging.getLogger(__name__)
 
+# Workflows run on a thread pool – serialise the read-advance-save of the index
+_STATE_LOCK = threading.Lock()
+# …and across uvicorn worker processes, via an advisory lock on a sidecar file
+_STATE_LOCK_FILE = STATE_FILE.with_suffix(".lock")
+
+# Days of posted-word history kept in state.json for the duplicate guard
+_POSTED_KEEP_DAYS = 7
+# A claim still "pending" after this long belongs to a run that died (killed,
+# OOM, restart) – a new trigger may take it over. Well above a run's duration.
+_PENDING_CLAIM_TIMEOUT = 30 * 60
+
+# Parsed word list, keyed by the file's mtime – edits to words.txt still apply live
+_WORDS_CACHE: Optional[tuple[int, tuple[str, ...]]] = None   # (mtime_ns, words)
+
 
 # ─── Word list ─────────────────────────────────────────────────────────────────
 
-def _load_words() -> List[str]:
-    """Load words from data/words.txt (one word per line, # lines are comments)."""
-    if not WORDS_FILE.exists():
+def _load_words() -> tuple[str, ...]:
+    """
+    Load words from data/words.txt (one word per line, # lines are comments).
+    Parsed once and reused until the file's mtime changes.
+    """
+    global _WORDS_CACHE
+    try:
+        mtime_ns = WORDS_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"Word list not found at {WORDS_FILE}. "
             "Please add your IELTS/GRE word list (one word per line)."
-        )
-    words = []
-    with open(WORDS_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            stripped = line.strip()
-            if stripped and not stripped.startswith("#"):
-                words.append(stripped)
+        ) from None
+    if _WORDS_CACHE is not None and _WORDS_CACHE[0] == mtime_ns:
+        return _WORDS_CACHE[1]
+
+    lines = map(str.strip, WORDS_FILE.read_text(encoding="utf-8").splitlines())
+    words = [w for w in lines if w and not w.startswith("#")]
     if not words:
         raise ValueError(f"Word list at {WORDS_FILE} is empty.")
     logger.debug("Loaded %d words from word list.", len(words))
-    return words
+    _WORDS_CACHE = (mtime_ns, tuple(words))
+    return _WORDS_CACHE[1]
 
 
 # ─── State persistence ─────────────────────────────────────────────────────────
+# The parsed state is kept in memory, tagged with the (inode, mtime, size) of
+# the file it was read from. Every save replaces the file (new inode), so a
+# write by another worker process is seen on the next read even when it lands
+# within the filesystem's timestamp granularity.
+_STATE_CACHE: Optional[tuple[Optional[tuple[int, int, int]], dict[str, Any]]] = None   # (stamp, state)
+
+
+def _state_stamp() -> Optional[tuple[int, int, int]]:
+    try:
+        st = STATE_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
 
-def _load_state() -> dict:
-    """Load persisted state. Returns default state if file is missing/corrupt."""
-    if STATE_FILE.exists():
+
+def _load_state() -> dict[str, Any]:
+    """Return the current state. Falls back to the default state if the file is missing/corrupt."""
+    global _STATE_CACHE
+    stamp = _state_stamp()
+    if _STATE_CACHE is not None and _STATE_CACHE[0] == stamp:
+        return _STATE_CACHE[1]
+
+    state: dict[str, Any] = {"current_index": 0, "total_processed": 0, "last_word": ""}
+    if stamp is not None:
         try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
+            state = orjson.loads(STATE_FILE.read_bytes())
+        except (orjson.JSONDecodeError, OSError) as e:
             logger.warning("State file corrupt or unreadable (%s). Resetting to 0.", e)
-    return {"current_index": 0, "total_processed": 0, "last_word": ""}
+    # Claims per day: {"2025-03-14": {"abjure": {"status": "pending" | "posted", "at": epoch}}}
+    # (older files hold plain word lists – those words were posted)
+    state["posted"] = {
+        day: words if isinstance(words, dict)
+        else {w: {"status": "posted", "at": 0} for w in words}
+        for day, words in state.get("posted", {}).items()
+    }
+    _STATE_CACHE = (stamp, state)
+    return state
 
 
-def _save_state(state: dict) -> None:
-    """Atomically save state to disk (write temp + rename)."""
-    dir_ = STATE_FILE.parent
+def _save_state(state: dict[str, Any]) -> None:
+    """Persist state atomically (write temp + rename)."""
+    global _STATE_CACHE
     try:
-        fd, tmp_path = tempfile.mkstemp(dir=dir_, suffix=".tmp")
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-        os.replace(tmp_path, STATE_FILE)
-        logger.debug("State saved: index=%d word='%s'", state["current_index"], state["last_word"])
+        fd, tmp_path = tempfile.mkstemp(dir=STATE_FILE.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                # Machine-only file – orjson's compact UTF-8 output, no indentation
+                f.write(orjson.dumps(state))
+            os.replace(tmp_path, STATE_FILE)
+        except OSError:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
     except OSError as e:
+        # The in-memory copy was already changed – drop it, so the next read
+        # goes back to what is actually on disk
+        _STATE_CACHE = None
         logger.error("Failed to save state: %s", e)
         raise
+    _STATE_CACHE = (_state_stamp(), state)
+    logger.debug("State saved: index=%d word='%s'", state["current_index"], state["last_word"])
+
+
+@contextmanager
+def _state_locked() -> Iterator[None]:
+    """Hold the state lock for this thread and for every other worker process."""
+    with _STATE_LOCK, open(_STATE_LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 
 # ─── Public API ────────────────────────────────────────────────────────────────
@@ -76,23 +149,74 @@ def selectNextWord() -> str:  # noqa: N802 – name kept as specified in the spe
     The function always returns a non-empty string.
     """
     words = _load_words()
-    state = _load_state()
+    with _state_locked():
+        state = _load_state()
 
-    index = state.get("current_index", 0) % len(words)
-    word = words[index]
+        index: int = state.get("current_index", 0) % len(words)
+        word = words[index]
 
-    # Advance and wrap around
-    next_index = (index + 1) % len(words)
-    state["current_index"] = next_index
-    state["total_processed"] = state.get("total_processed", 0) + 1
-    state["last_word"] = word
+        # Advance and wrap around
+        next_index = (index + 1) % len(words)
+        state["current_index"] = next_index
+        state["total_processed"] = state.get("total_processed", 0) + 1
+        state["last_word"] = word
 
-    _save_state(state)
+        # Persist now, before the slow LLM/image steps, so a crash there
+        # can never hand out the same word twice.
+        _save_state(state)
     logger.info("Selected word #%d (index %d): '%s'", state["total_processed"], index, word)
     return word
 
 
-def get_status() -> dict:
+def claim_post(day: date, word: str) -> bool:
+    """
+    Mark `word` as being posted on `day` (pending until confirm_post()).
+    Returns False if it was already posted, or another run's claim is still
+    pending – the caller must then skip the run. A pending claim older than
+    30 minutes is taken over. History older than 7 days is dropped.
+    """
+    key, word = day.isoformat(), word.strip().lower()
+    now = int(time.time())
+    with _state_locked():
+        state = _load_state()
+        posted = state["posted"]
+        claim = posted.get(key, {}).get(word)
+        if claim is not None:
+            if claim["status"] == "posted" or now - claim["at"] < _PENDING_CLAIM_TIMEOUT:
+                return False
+            logger.warning("Taking over a stale claim for '%s' on %s.", word, key)
+        posted.setdefault(key, {})[word] = {"status": "pending", "at": now}
+        cutoff = (day - timedelta(days=_POSTED_KEEP_DAYS)).isoformat()
+        for old in [d for d in posted if d < cutoff]:
+            del posted[old]
+        _save_state(state)
+    return True
+
+
+def confirm_post(day: date, word: str) -> None:
+    """Turn the claim from claim_post() into "posted" once the post is live."""
+    key, word = day.isoformat(), word.strip().lower()
+    with _state_locked():
+        state = _load_state()
+        state["posted"].setdefault(key, {})[word] = {"status": "posted", "at": int(time.time())}
+        _save_state(state)
+
+
+def release_post(day: date, word: str) -> None:
+    """Drop a pending claim after a failed run, so a retry may post the word."""
+    key, word = day.isoformat(), word.strip().lower()
+    with _state_locked():
+        state = _load_state()
+        posted = state["posted"]
+        claim = posted.get(key, {}).get(word)
+        if claim is not None and claim["status"] == "pending":
+            del posted[key][word]
+            if not posted[key]:
+                del posted[key]
+            _save_state(state)
+
+
+def get_status() -> dict[str, Any]:
     """Return current state info for health/status endpoints."""
     state = _load_state()
     try:
@@ -1,21 +1,29 @@
 """
 Scheduler – triggers the word-of-the-day workflow at fixed times (Asia/Dhaka).
 
-Posting times (24 h, Asia/Dhaka): 08:00, 12:00, 18:00, 20:00
+Posting times (24 h, Asia/Dhaka): see POSTING_TIMES below.
+At 03:00 (off-peak) the day's posts are pre-generated – texts in one batched
+LLM call, then each post image; each posting trigger then passes its slot
+(YYYY-MM-DD-HH) to pick its post up.
 
 Runs as a separate background process started by start.sh.
-It calls the FastAPI /webhook/trigger endpoint over localhost so the workflow
+It calls the FastAPI /webhook/* endpoints over localhost so the workflow
 logic stays in one place and authentication still goes through the secret check.
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import time
+from datetime import datetime
 from pathlib import Path
+from zoneinfo import ZoneInfo
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 # ── .env must be loaded before reading PORT / WEBHOOK_SECRET ──────────────────
 _ROOT = Path(__file__).resolve().parent
@@ -24,53 +32,126 @@ load_dotenv(_ROOT / ".env")
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from modules.config import TIMEZONE
+
 # ── Settings ──────────────────────────────────────────────────────────────────
-TIMEZONE = "Asia/Dhaka"
+_TZ = ZoneInfo(TIMEZONE)   # resolved once, shared by the scheduler and both triggers
 POSTING_TIMES = ["6", "8", "10", "16", "20", "23"]   # hours (24 h clock) in Asia/Dhaka
+PREGENERATE_HOUR = 3   # pre-generate the day's posts off-peak, before the first slot
 
 _PORT = int(os.getenv("PORT", "8002"))
 _WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
 _TRIGGER_URL = f"http://localhost:{_PORT}/webhook/trigger"
+_PREGENERATE_URL = f"http://localhost:{_PORT}/webhook/pregenerate"
+_STATUS_URL = f"http://localhost:{_PORT}/webhook/status"
+
+# One keep-alive connection to the local server, reused across firings
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 _LOG_FILE = _ROOT / "logs" / "scheduler.log"
 _LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
 
+_log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s – %(message)s")
+_log_outputs: list[logging.Handler] = [
+    logging.StreamHandler(),
+    logging.handlers.RotatingFileHandler(
+        _LOG_FILE, maxBytes=2 * 1024 * 1024, backupCount=3, encoding="utf-8"
+    ),
+]
+for _h in _log_outputs:
+    _h.setFormatter(_log_formatter)
+
+# Jobs only enqueue records; a listener thread does the console/file writes
+# (and rotation), so a slow disk never delays a trigger.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_outputs)
+_log_listener.start()
+atexit.register(_log_listener.stop)   # drains the queue before exit
+
+# The queue carries bare messages; the listener's handlers apply the real format
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s – %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.handlers.RotatingFileHandler(
-            _LOG_FILE, maxBytes=2 * 1024 * 1024, backupCount=3, encoding="utf-8"
-        ),
-    ],
+    format="%(message)s",
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
 )
 logger = logging.getLogger("scheduler")
 
 
-# ── Job ───────────────────────────────────────────────────────────────────────
+# ── Jobs ──────────────────────────────────────────────────────────────────────
 
-def _trigger_workflow() -> None:
-    """Called by APScheduler at each scheduled time."""
+def _headers() -> dict[str, str]:
     headers: dict[str, str] = {}
     if _WEBHOOK_SECRET:
         headers["X-Webhook-Secret"] = _WEBHOOK_SECRET
+    return headers
 
-    logger.info("Firing workflow trigger → %s", _TRIGGER_URL)
+
+def _pregenerate_today() -> None:
+    """Called by APScheduler once a day, before the first posting hour."""
+    today = datetime.now(_TZ).date().isoformat()
+    payload = {"date": today, "hours": [int(h) for h in POSTING_TIMES]}
+
+    logger.info("Requesting pre-generation for %s → %s", today, _PREGENERATE_URL)
     try:
-        resp = requests.post(_TRIGGER_URL, headers=headers, timeout=300)
-        data = resp.json()
-        if resp.status_code == 200 and data.get("success"):
-            logger.info(
-                "Workflow OK – word=%s, post_id=%s, elapsed=%.1fs",
-                data.get("word"),
-                data.get("post_id"),
-                data.get("elapsed_seconds", 0),
+        # The server answers 202 at once and pre-generates in the background
+        resp = _SESSION.post(_PREGENERATE_URL, headers=_headers(), json=payload, timeout=10)
+        if resp.status_code == 202:
+            logger.info("Pre-generation accepted for %s (outcome in the server log).", today)
+        else:
+            # Error bodies may be HTML (e.g. from a reverse proxy) – log them raw
+            logger.error(
+                "Pre-generation rejected (HTTP %s): %s", resp.status_code, resp.text[:500]
             )
+    except requests.exceptions.ConnectionError:
+        logger.error(
+            "Could not connect to FastAPI server at %s. Is it running?", _PREGENERATE_URL
+        )
+    except Exception as e:
+        logger.exception("Unexpected error requesting pre-generation: %s", e)
+
+
+def _log_previous_run() -> None:
+    """Log how the previous workflow run ended (the trigger no longer waits for it)."""
+    try:
+        resp = _SESSION.get(_STATUS_URL, headers=_headers(), timeout=10)
+        run = resp.json() if resp.status_code == 200 else {}
+    except (requests.exceptions.RequestException, ValueError):
+        return   # best effort only
+    result = run.get("result") or {}
+    if run.get("state") == "succeeded":
+        logger.info(
+            "Previous run (slot %s) OK – word=%s, post_id=%s, elapsed=%.1fs",
+            run.get("slot"),
+            result.get("word"),
+            result.get("post_id"),
+            result.get("elapsed_seconds", 0),
+        )
+    elif run.get("state") == "failed":
+        logger.error("Previous run (slot %s) failed: %s", run.get("slot"), run.get("error"))
+    elif run.get("state") == "running":
+        logger.warning("Previous run (slot %s) is still running.", run.get("slot"))
+
+
+def _trigger_workflow() -> None:
+    """Called by APScheduler at each scheduled time."""
+    _log_previous_run()
+
+    now = datetime.now(_TZ)
+    slot = f"{now:%Y-%m-%d}-{now.hour:02d}"
+
+    logger.info("Firing workflow trigger for slot %s → %s", slot, _TRIGGER_URL)
+    try:
+        # The server answers 202 at once and runs the workflow in the background
+        resp = _SESSION.post(
+            _TRIGGER_URL, headers=_headers(), params={"slot": slot}, timeout=10
+        )
+        if resp.status_code == 202:
+            logger.info("Workflow accepted for slot %s. Result: GET %s", slot, _STATUS_URL)
         else:
             logger.error(
-                "Workflow returned failure (HTTP %s): %s", resp.status_code, data
+                "Workflow trigger rejected (HTTP %s): %s", resp.status_code, resp.text[:500]
             )
     except requests.exceptions.ConnectionError:
         logger.error(
@@ -91,15 +172,23 @@ def main() -> None:
         _TRIGGER_URL,
     )
 
-    scheduler = BlockingScheduler(timezone=TIMEZONE)
+    scheduler = BlockingScheduler(timezone=_TZ)
     scheduler.add_job(
         _trigger_workflow,
-        trigger=CronTrigger(hour=hour_str, minute=0, timezone=TIMEZONE),
+        trigger=CronTrigger(hour=hour_str, minute=0, timezone=_TZ),
         id="word_of_the_day",
         name="Word-of-the-Day trigger",
         misfire_grace_time=300,  # fire up to 5 min late (e.g. if server just restarted)
         coalesce=True,           # run once even if multiple fires were missed
     )
+    scheduler.add_job(
+        _pregenerate_today,
+        trigger=CronTrigger(hour=PREGENERATE_HOUR, minute=0, timezone=_TZ),
+        id="pregenerate",
+        name="Daily post pre-generation",
+        misfire_grace_time=3600,  # still worth doing late – the first slot is hours away
+        coalesce=True,
+    )
 
     # Log next scheduled run times
     scheduler.start.__doc__  # trigger lazy init so get_jobs() has next_run_time
@@ -12,9 +12,22 @@ PID_FILE="$SCRIPT_DIR/vocab_pro.pid"
 SCHED_PID_FILE="$SCRIPT_DIR/scheduler.pid"
 LOG_FILE="$SCRIPT_DIR/logs/startup.log"
 SCHED_LOG_FILE="$SCRIPT_DIR/logs/scheduler.log"
-PORT="${PORT:-8002}"
 
 cd "$SCRIPT_DIR"
+mkdir -p "$SCRIPT_DIR/logs"
+
+# Value of KEY in .env (last assignment wins), or empty if unset
+env_value() {
+    [[ -f .env ]] || return 0
+    grep -E "^[[:space:]]*$1=" .env | tail -n 1 | cut -d= -f2- \
+        | sed -e 's/[[:space:]]*#.*$//' -e 's/^["'\'']//' -e 's/["'\'']$//' | tr -d '\r' || true
+}
+
+# The shell environment wins, then .env, then the default
+PORT="${PORT:-$(env_value PORT)}"
+PORT="${PORT:-8002}"
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-$(env_value WEB_CONCURRENCY)}"   # uvicorn worker processes
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-2}"
 
 # ── Stop existing FastAPI instance ────────────────────────────────────────────
 if [[ -f "$PID_FILE" ]]; then
@@ -41,18 +54,29 @@ fi
 # ── Activate venv ─────────────────────────────────────────────────────────────
 source "$SCRIPT_DIR/venv/bin/activate"
 
+# ── Optional: compile word_manager with mypyc (MYPYC_BUILD=1, needs mypy) ─────
+# A compiled module shadows its .py, so old builds are always removed first –
+# otherwise an edited word_manager.py would be silently ignored.
+rm -f modules/word_manager.*.so modules/word_manager__mypyc.*.so
+if [[ "${MYPYC_BUILD:-0}" == "1" ]]; then
+    echo "Compiling modules/word_manager.py with mypyc…"
+    venv/bin/mypyc modules/word_manager.py >> "$LOG_FILE" 2>&1 \
+        || echo "  mypyc build failed – running the pure-Python module (see $LOG_FILE)"
+fi
+
 # ── Start FastAPI server ───────────────────────────────────────────────────────
 echo "Starting Vocabulary Pro (FastAPI) on port $PORT…"
-mkdir -p "$SCRIPT_DIR/logs"
 nohup venv/bin/python -m uvicorn main:app \
     --host 0.0.0.0 \
     --port "$PORT" \
-    --workers 1 \
+    --loop uvloop \
+    --http httptools \
+    --workers "$WEB_CONCURRENCY" \
     >> "$LOG_FILE" 2>&1 &
 
 NEW_PID=$!
 echo "$NEW_PID" > "$PID_FILE"
-echo "  FastAPI started (PID $NEW_PID). Logs: $LOG_FILE"
+echo "  FastAPI started (PID $NEW_PID). Logs: $LOG_FILE, workflow: logs/vocab_pro*.log"
 
 # ── Wait briefly so FastAPI is up before scheduler tries to connect ────────────
 sleep 3